@@ -0,0 +1,18 @@
+# Reload after only the generated SVA (regblock.pyc.sv) changed: the design
+# files analyzed by regblock.tcl are kept, the miter that includes the SVA is
+# re-analyzed and the design re-elaborated.
+
+set err_status [catch {analyze -sv12 +define+JASPER +define+SYNTHESIS +libext+.v+.sv+.vh+.svh+ two_trace.sv} err_msg]
+if $err_status {error $err_msg}
+
+elaborate \
+    -top miter \
+    -extract_case_assertions \
+    -no_preconditions \
+
+clock clk
+
+# Constrain primary inputs to only change on @(posedge eph1)
+clock -rate -default clk
+
+reset_formal
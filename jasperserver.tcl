@@ -12,71 +12,252 @@ proc debug_puts {msg} {
     }
 }
 
-proc handle_client {sock addr port} {
+# All messages are length prefixed frames. A request frame is the 8 hex digit
+# byte length of its payload followed by the payload: the action name, a
+# newline and the action body. A result frame is a single character error
+# code, the 8 hex digit byte length of the result and the result itself.
 
-    global jg_server
-    global jg_server_semaphore
+# Several clients can be connected at once. The server reads their requests
+# as they arrive (fileevent) into a job queue per client, and runs one job at
+# a time, taking turns between the clients with queued jobs. Each client has
+# its own proof context: the assumptions it enabled or disabled are restored
+# whenever its jobs run after those of another client.
+
+# Connected clients (sockets in connection order)
+set jg_clients {}
+# Per client: input buffer, queued jobs ({action body} pairs) and the
+# assumptions it set ({name -enable|-disable} dict)
+array set jg_client_buf {}
+array set jg_client_jobs {}
+array set jg_client_assms {}
+# Assumptions set in Jasper (those not in the dict are enabled)
+set jg_assms [dict create]
+# Index of the client to take the next job from
+set jg_next_client 0
+# Is running the next job scheduled (or a job running)
+set jg_jobs_scheduled 0
+
+proc send_frame {sock frame} {
+    if {[catch {puts -nonewline $sock $frame; flush $sock}]} {
+        puts "Error sending to client."
+        drop_client $sock
+    }
+}
+
+proc result_frame {errorstr result} {
+    set data [encoding convertto utf-8 $result]
+    return [format "%s%08x" $errorstr [string length $data]]$data
+}
+
+# Keep track of the assumptions set by a client and in Jasper
+proc track_command {sock command} {
+    global jg_client_assms jg_clients jg_assms
+
+    if {[regexp {^\s*assume\s+(-enable|-disable)\s+(.+?)\s*$} $command -> mode assm]} {
+        dict set jg_client_assms($sock) $assm $mode
+        dict set jg_assms $assm $mode
+    } elseif {[regexp {^\s*include\s} $command]} {
+        # Loading a script resets all assumptions (for all clients)
+        set jg_assms [dict create]
+        set jg_client_assms($sock) [dict create]
+    }
+}
+
+# Restore the assumptions set by a client before running its jobs
+proc switch_context {sock} {
+    global jg_client_assms jg_assms
+
+    set wanted $jg_client_assms($sock)
+    dict for {assm mode} $jg_assms {
+        if {$mode eq "-disable" && ![dict exists $wanted $assm]} {
+            catch {assume -enable $assm}
+            dict unset jg_assms $assm
+        }
+    }
+    dict for {assm mode} $wanted {
+        if {![dict exists $jg_assms $assm] || [dict get $jg_assms $assm] ne $mode} {
+            catch {assume $mode $assm}
+            dict set jg_assms $assm $mode
+        }
+    }
+}
+
+# Evaluate a command of a client and return its result frame. The command is
+# evaluated at the global level.
+proc eval_command {sock command} {
+
+    puts "Received command: $command"
+
+    set error [catch {uplevel #0 $command} result]
+
+    puts "Result: $result"
+    puts "Error: $error"
+
+    if {$error == 0} {
+        # Send non-error return code
+        set errorstr "0"
+        track_command $sock $command
+    } else {
+        # Send error code
+        set errorstr "1"
+    }
+
+    return [result_frame $errorstr $result]
+}
+
+proc queued_jobs {} {
+    global jg_clients jg_client_jobs
+    set count 0
+    foreach sock $jg_clients {
+        incr count [llength $jg_client_jobs($sock)]
+    }
+    return $count
+}
+
+# Queue depth as seen by a client
+proc queue_depth {sock} {
+    global jg_clients jg_client_jobs
+    return [list clients [llength $jg_clients] jobs [queued_jobs] \
+        client_jobs [llength $jg_client_jobs($sock)]]
+}
+
+proc accept_client {sock addr port} {
+    global jg_clients jg_client_buf jg_client_jobs jg_client_assms
 
     puts "Accepted connection from [fconfigure $sock -peername] on port $port"
 
     global env; puts $env(PATH)
 
-    fconfigure $sock -buffering line -encoding utf-8
+    lappend jg_clients $sock
+    set jg_client_buf($sock) ""
+    set jg_client_jobs($sock) {}
+    set jg_client_assms($sock) [dict create]
 
-    while {[gets $sock action] != -1} {
+    fconfigure $sock -translation binary -buffering full -blocking 0
+    fileevent $sock readable [list read_client $sock]
+}
 
-        puts "Received action: $action"
+proc drop_client {sock} {
+    global jg_clients jg_client_buf jg_client_jobs jg_client_assms
 
-        if {$action eq "CLOSE"} {
-            # Close current connection
-            close $sock
-            puts "Connection closed."
-            return
-        } elseif {$action eq "SHUTDOWN"} {
-            # Close the current connection and server
-            close $sock
-            puts "Connection closed."
-            jg_stop_server
-            return
-        } elseif {$action eq "EVAL"} {
+    set idx [lsearch -exact $jg_clients $sock]
+    if {$idx == -1} {
+        return
+    }
+    set jg_clients [lreplace $jg_clients $idx $idx]
+    unset jg_client_buf($sock) jg_client_jobs($sock) jg_client_assms($sock)
+    catch {close $sock}
+    puts "Connection closed."
+}
 
-            puts "Getting command."
+# Read the available data of a client and queue its complete requests
+proc read_client {sock} {
+    global jg_client_buf jg_client_jobs
 
-            if {[gets $sock command] != -1} {
+    if {[catch {read $sock} data]} {
+        drop_client $sock
+        return
+    }
+    append jg_client_buf($sock) $data
 
-                puts "Received command: $command"
+    while {[string length $jg_client_buf($sock)] >= 8} {
+        scan [string range $jg_client_buf($sock) 0 7] %x len
+        if {[string length $jg_client_buf($sock)] < 8 + $len} {
+            break
+        }
+        set payload [string range $jg_client_buf($sock) 8 [expr {7 + $len}]]
+        set jg_client_buf($sock) [string range $jg_client_buf($sock) [expr {8 + $len}] end]
 
-                set error [catch {eval $command} result]
+        set nl [string first "\n" $payload]
+        if {$nl == -1} {
+            set action $payload
+            set body ""
+        } else {
+            set action [string range $payload 0 [expr {$nl - 1}]]
+            set body [string range $payload [expr {$nl + 1}] end]
+        }
 
-                puts "Result: $result"
-                puts "Error: $error"
+        puts "Received action: $action"
 
-                if {$error == 0} {
-                    # Send non-error return code
-                    set errorstr "0"
+        if {$action eq "QUEUE"} {
+            # Answered at once, not queued
+            send_frame $sock [result_frame "0" [queue_depth $sock]]
+        } else {
+            lappend jg_client_jobs($sock) [list $action $body]
+        }
+    }
 
-                } else {
-                    # Send error code
-                    set errorstr "1"
-                }
+    if {[eof $sock]} {
+        drop_client $sock
+        return
+    }
+    schedule_jobs
+}
 
-                set reslen [string length $result]
-                set lenstr [format "%08x" $reslen]
+proc schedule_jobs {} {
+    global jg_jobs_scheduled
+    if {!$jg_jobs_scheduled && [queued_jobs] > 0} {
+        set jg_jobs_scheduled 1
+        after idle run_next_job
+    }
+}
 
-                puts "Sending result length: $lenstr"
-                puts "Sending result: $result"
+# Run the next job, taking turns between the clients
+proc run_next_job {} {
+    global jg_jobs_scheduled jg_clients jg_client_jobs jg_next_client
 
-                puts $sock $errorstr$lenstr$result
-            } else {
-                puts "Error reading command."
-            }
+    # Jobs are not nested even if a command enters the event loop
+    set n [llength $jg_clients]
+    for {set i 0} {$i < $n} {incr i} {
+        set idx [expr {($jg_next_client + $i) % $n}]
+        set sock [lindex $jg_clients $idx]
+        if {[llength $jg_client_jobs($sock)] > 0} {
+            set jg_next_client [expr {$idx + 1}]
+            set job [lindex $jg_client_jobs($sock) 0]
+            set jg_client_jobs($sock) [lrange $jg_client_jobs($sock) 1 end]
+            run_job $sock {*}$job
+            break
         }
-
     }
+    set jg_jobs_scheduled 0
+    schedule_jobs
+}
 
-    close $sock
-    puts "Connection closed."
+proc run_job {sock action body} {
+
+    if {$action eq "CLOSE"} {
+        # Close current connection
+        drop_client $sock
+    } elseif {$action eq "SHUTDOWN"} {
+        # Close the current connection and server
+        drop_client $sock
+        jg_stop_server
+    } elseif {$action eq "EVAL"} {
+        # The body is the command
+        switch_context $sock
+        set frame [eval_command $sock [encoding convertfrom utf-8 $body]]
+        puts "Sending result: $frame"
+        send_frame $sock $frame
+    } elseif {$action eq "BATCH"} {
+        # The body is a sequence of commands, each prefixed with its 8 hex
+        # digit byte length. The results are sent back as a single frame
+        # of result frames.
+        switch_context $sock
+        set payload ""
+        set count 0
+        set pos 0
+        while {$pos < [string length $body]} {
+            scan [string range $body $pos [expr {$pos + 7}]] %x len
+            set start [expr {$pos + 8}]
+            set pos [expr {$start + $len}]
+            set command [string range $body $start [expr {$pos - 1}]]
+            append payload [eval_command $sock [encoding convertfrom utf-8 $command]]
+            incr count
+        }
 
+        puts "Sending batch of $count results"
+        send_frame $sock [format "0%08x" [string length $payload]]$payload
+    }
 }
 
 proc jg_start_server {port} {
@@ -84,14 +265,15 @@ proc jg_start_server {port} {
     global jg_server_semaphore
 
     # Create a server socket
-    set jg_server [socket -server handle_client $port]
+    set jg_server [socket -server accept_client $port]
     puts "Server started on port $port"
 
-    # fconfigure $server_socket -blocking 1  ;# Set the socket to blocking mode
-
-    # Wait for the server to be closed
+    # Serve clients until the server is shut down
     vwait jg_server_semaphore
     close $jg_server
+    foreach sock $::jg_clients {
+        drop_client $sock
+    }
     puts "Server closed."
 }
 
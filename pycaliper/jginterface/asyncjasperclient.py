@@ -0,0 +1,159 @@
+"""
+    asyncio client for the Jasper console server (jasperserver.tcl)
+
+    A single event loop can drive many AsyncJasperSessions (and overlap proof
+    waits with other work) without dedicating a thread to each socket.
+
+    This is only the transport: no verifier or synthesizer drives it yet.
+    Unlike JasperSession, it keeps no session statistics, does not use the
+    proof cache and does not reconnect when the connection is lost.
+"""
+
+import asyncio
+import logging
+
+from .jasperclient import (
+    DEFAULTHOST,
+    DEFAULTPORT,
+    SocketError,
+    JasperError,
+    is_online,
+    _frame,
+    _request,
+    _parse_batch,
+    _check_error,
+)
+from .jgoracle import ProofResult, get_wctx, prove_cmd, status_result
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncJasperSession:
+    """An asyncio session with a Jasper console server"""
+
+    def __init__(self, host: str = DEFAULTHOST, port: int = DEFAULTPORT) -> None:
+        """
+        Args:
+            host (str, optional): host running the Jasper server. Defaults to DEFAULTHOST.
+            port (int, optional): port of the Jasper server. Defaults to DEFAULTPORT.
+        """
+        self.host = host
+        self.port = port
+        self.reader: asyncio.StreamReader = None
+        self.writer: asyncio.StreamWriter = None
+        # Number of messages (EVAL or BATCH) sent in this session
+        self.msgs_sent = 0
+        self._lock = asyncio.Lock()
+
+    async def connect(self) -> "AsyncJasperSession":
+        if is_online():
+            try:
+                self.reader, self.writer = await asyncio.open_connection(
+                    self.host, self.port
+                )
+            except OSError:
+                raise SocketError(
+                    f"Unable to connect to Jasper console server at {self.host}:{self.port}"
+                )
+        else:
+            logger.info(f"Connecting to {self}, but in SIM mode. Not connecting.")
+        return self
+
+    async def _send(self, action: str, body: bytes = b""):
+        self.writer.write(_request(action, body))
+        await self.writer.drain()
+
+    async def _receive_frame(self):
+        # Single character return code and 8 hex digit payload length
+        header = await self.reader.readexactly(9)
+        errcode = chr(header[0])
+        msglen = int(header[1:], 16)
+        return {"error": errcode, "payload": await self.reader.readexactly(msglen)}
+
+    async def _end(self, action: str):
+        if is_online():
+            async with self._lock:
+                await self._send(action)
+                self.writer.close()
+                await self.writer.wait_closed()
+        else:
+            logger.info(f"Sending {action}, but in SIM mode. Not sending.")
+
+    async def close(self):
+        await self._end("CLOSE")
+
+    async def shutdown(self):
+        await self._end("SHUTDOWN")
+
+    async def eval(self, command: str) -> str:
+        """Evaluate a command
+
+        Args:
+            command (str): command to evaluate
+
+        Raises:
+            JasperError: if the command failed
+
+        Returns:
+            str: result of the command
+        """
+        if not is_online():
+            logger.debug(f"Sending command: {command}, but in SIM mode. Not sending.")
+            return "SIM"
+        async with self._lock:
+            await self._send("EVAL", command.encode("utf-8"))
+            self.msgs_sent += 1
+            frame = await self._receive_frame()
+        result = {"error": frame["error"], "value": frame["payload"].decode("utf-8")}
+        if _check_error(result):
+            return result["value"]
+        else:
+            raise JasperError(result["value"])
+
+    async def eval_batch(self, commands: list[str]) -> list[str]:
+        """Evaluate a batch of commands in a single round trip
+
+        Args:
+            commands (list[str]): commands to evaluate (in order)
+
+        Raises:
+            JasperError: if any command in the batch failed
+
+        Returns:
+            list[str]: results of the commands
+        """
+        if not commands:
+            return []
+        if not is_online():
+            logger.debug(f"Sending batch: {commands}, but in SIM mode. Not sending.")
+            return ["SIM" for _ in commands]
+        async with self._lock:
+            await self._send(
+                "BATCH", b"".join([_frame(c.encode("utf-8")) for c in commands])
+            )
+            self.msgs_sent += 1
+            batch = await self._receive_frame()
+        results = _parse_batch(batch["payload"], len(commands))
+        errors = [r["value"] for r in results if not _check_error(r)]
+        if errors:
+            raise JasperError("\n".join(errors))
+        return [r["value"] for r in results]
+
+    async def prove(self, taskcon: str, prop: str) -> ProofResult:
+        """Prove a property
+
+        Args:
+            taskcon (str): proof node the property is defined under
+            prop (str): property name
+
+        Returns:
+            ProofResult: result of the proof
+        """
+        prop_wctx = get_wctx(taskcon, f"P_{prop}")
+        logger.debug(f"Proving property: {prop_wctx}")
+        res: str = await self.eval(prove_cmd(prop_wctx))
+        logger.debug(f"Proving property: {prop_wctx} returned {res}")
+        return status_result(res)
+
+    def __str__(self) -> str:
+        return f"AsyncJasperSession({self.host}:{self.port})"
@@ -0,0 +1,187 @@
+"""
+    Hashes of the design and specification files loaded into Jasper
+"""
+
+import os
+import re
+import uuid
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Files under the Jasper directory that are part of the design
+DESIGN_EXTS = (".sv", ".v", ".svh", ".vh", ".lst", ".f", ".tcl")
+
+
+def file_hash(path: str) -> str:
+    """Hash the contents of a file ("" if the file does not exist)"""
+    if not os.path.isfile(path):
+        return ""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def files_hash(paths: list[str]) -> str:
+    """Hash the contents of several files (in order)"""
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(file_hash(path).encode("utf-8"))
+    return h.hexdigest()
+
+
+# Tcl commands that read another script, and analyze options that read a file list
+_SCRIPT_REF = re.compile(r"(?:^|[\s;\[{])(include|source)\s+(\S+)|\s(-[fF])\s+(\S+)")
+# Tcl variable assignments: set NAME value, set env(NAME) value
+_SCRIPT_SET = re.compile(r"^\s*set\s+(?:env\((\w+)\)|(\w+))\s+(\S+)\s*$")
+# Variable references: ${NAME}, $env(NAME), $NAME
+_VAR_REF = re.compile(r"\$\{(\w+)\}|\$env\((\w+)\)|\$(\w+)")
+
+
+class _DesignFiles:
+    """Files referenced by a Jasper script: the scripts it includes, the file
+    lists of its analyze commands and the files (and include directories) they
+    list. References that cannot be resolved statically are missed."""
+
+    def __init__(self, jdir: str) -> None:
+        self.jdir = jdir
+        self.vars: dict[str, str] = dict(os.environ)
+        self.files: list[str] = []
+        self.missed: list[str] = []
+
+    def _resolve(self, ref: str, base: str) -> str:
+        # Path of a reference (None if it cannot be resolved)
+        ref = ref.strip("\"'{}")
+        ref = _VAR_REF.sub(
+            lambda m: self.vars.get(next(g for g in m.groups() if g), m.group(0)), ref
+        )
+        if "$" in ref or "[" in ref:
+            self.missed.append(ref)
+            return None
+        return os.path.abspath(os.path.join(base, ref))
+
+    def _add(self, path: str) -> bool:
+        if path in self.files:
+            return False
+        if not os.path.isfile(path):
+            self.missed.append(path)
+            return False
+        self.files.append(path)
+        return True
+
+    def add_script(self, path: str):
+        if not self._add(path):
+            return
+        with open(path, errors="replace") as f:
+            for line in f:
+                line = re.sub(r"(^|;)\s*#.*$", "", line)
+                if (m := _SCRIPT_SET.match(line)) is not None:
+                    value = (
+                        m.group(3)
+                        .strip('"')
+                        .replace("[pwd]", os.path.abspath(self.jdir))
+                    )
+                    self.vars[m.group(1) or m.group(2)] = value
+                for m in _SCRIPT_REF.finditer(line):
+                    # Jasper runs in the Jasper directory
+                    if m.group(1) is not None:
+                        ref = self._resolve(m.group(2), self.jdir)
+                        if ref is not None:
+                            self.add_script(ref)
+                    else:
+                        ref = self._resolve(m.group(4), self.jdir)
+                        if ref is not None:
+                            self.add_filelist(ref)
+
+    def add_filelist(self, path: str):
+        if not self._add(path):
+            return
+        with open(path, errors="replace") as f:
+            words = re.sub(r"//.*|#.*", "", f.read()).split()
+        i = 0
+        while i < len(words):
+            word = words[i]
+            if word in ("-f", "-F", "-v", "-y") and i + 1 < len(words):
+                # -F paths are relative to the file list
+                base = os.path.dirname(path) if word == "-F" else self.jdir
+                ref = self._resolve(words[i + 1], base)
+                if ref is not None:
+                    if word in ("-f", "-F"):
+                        self.add_filelist(ref)
+                    elif word == "-v":
+                        self._add(ref)
+                    else:
+                        self.add_dir(ref)
+                i += 2
+                continue
+            if word.startswith("+incdir+"):
+                for d in word[len("+incdir+") :].split("+"):
+                    if d != "" and (ref := self._resolve(d, self.jdir)) is not None:
+                        self.add_dir(ref)
+            elif not word.startswith(("+", "-")):
+                if (ref := self._resolve(word, self.jdir)) is not None:
+                    self._add(ref)
+            i += 1
+
+    def add_dir(self, path: str):
+        if not os.path.isdir(path):
+            self.missed.append(path)
+            return
+        for f in sorted(os.listdir(path)):
+            if f.endswith(DESIGN_EXTS):
+                self._add(os.path.join(path, f))
+
+
+def design_files(jdir: str, script: str) -> tuple[list[str], list[str]]:
+    """Files a Jasper script reads, found by following its includes and the
+    file lists of its analyze commands
+
+    Args:
+        jdir (str): Jasper directory
+        script (str): Jasper script (relative to jdir)
+
+    Returns:
+        tuple[list[str], list[str]]: the files, and the references that could not
+            be resolved (e.g., computed paths or missing files)
+    """
+    files = _DesignFiles(jdir)
+    files.add_script(os.path.abspath(os.path.join(jdir, script)))
+    return files.files, files.missed
+
+
+def design_hash(jdir: str, script: str, exclude: list[str] = []) -> str:
+    """Hash the Jasper script, the design files under the Jasper directory and
+    the files the script reads from elsewhere (see design_files). If some
+    references of the script cannot be resolved, the hash is unique, so that
+    nothing cached against the design is reused.
+
+    Args:
+        jdir (str): Jasper directory
+        script (str): Jasper script (relative to jdir)
+        exclude (list[str], optional): files to leave out (e.g., generated SVA). Defaults to [].
+
+    Returns:
+        str: hash of the design
+    """
+    excluded = [os.path.abspath(e) for e in exclude]
+    h = hashlib.sha256()
+    h.update(file_hash(os.path.join(jdir, script)).encode("utf-8"))
+    for root, dirs, files in os.walk(jdir):
+        dirs.sort()
+        for f in sorted(files):
+            path = os.path.join(root, f)
+            if f.endswith(DESIGN_EXTS) and os.path.abspath(path) not in excluded:
+                h.update(os.path.relpath(path, jdir).encode("utf-8"))
+                h.update(file_hash(path).encode("utf-8"))
+    files, missed = design_files(jdir, script)
+    for path in files:
+        if path not in excluded:
+            h.update(os.path.relpath(path, jdir).encode("utf-8"))
+            h.update(file_hash(path).encode("utf-8"))
+    if missed:
+        logger.warning(
+            f"Could not resolve design files {missed} of {script}, the design hash will not match any other"
+        )
+        h.update(uuid.uuid4().hex.encode("utf-8"))
+    return h.hexdigest()
@@ -0,0 +1,139 @@
+"""
+    Proof engine tuning from recorded proof timings
+"""
+
+import time
+import logging
+import sqlite3
+import threading
+
+from .jasperclient import JasperSession
+from .jgoracle import ProofResult, is_pass, prove_cmd, status_result
+
+logger = logging.getLogger(__name__)
+
+
+# Default location of the timings database (relative to the pycaliper directory)
+TUNING_FILE = "pycaliper.tuning.db"
+
+# Engine mixes benchmarked for each property class by a tuning run
+ENGINE_MIXES = {
+    "1t": ["Ht", "Hp", "N", "AM", "Ht Hp N"],
+    "2t": ["Ht", "Hp", "N", "AM", "Ht Hp N"],
+    "bmc": ["B", "Bm", "Ht", "B Ht"],
+}
+
+
+def property_class(prop_wctx: str) -> str:
+    """Class of a property: 1t (one trace invariants), 2t (two trace PER
+    properties) or bmc (BMC steps)"""
+    prop = prop_wctx.rsplit(".", 1)[-1]
+    if prop.startswith("P_step_"):
+        return "bmc"
+    if prop.endswith("_inv"):
+        return "1t"
+    return "2t"
+
+
+class EngineTuner:
+    """Proof timings by design, property and engine mix, and the engine mix
+    that proves each class of properties fastest"""
+
+    def __init__(self, design: str, path: str = TUNING_FILE):
+        """
+        Args:
+            design (str): design the timings are recorded for (e.g. its Jasper script)
+            path (str, optional): location of the sqlite database. Defaults to TUNING_FILE.
+        """
+        self.design = design
+        self.path = path
+        # Engine mix picked for each property class ("" for the script's engines)
+        self.picked: dict[str, str] = {}
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS timings ("
+            + "design TEXT, class TEXT, prop TEXT, engines TEXT, result TEXT, "
+            + "conclusive INTEGER, time REAL)"
+        )
+        self.conn.commit()
+
+    def record(self, prop_wctx: str, engines: str, res: ProofResult, time: float):
+        """Record the time taken by a proof
+
+        Args:
+            prop_wctx (str): hierarchical property name
+            engines (str): engine mix of the proof ("" for the script's engines)
+            res (ProofResult): result of the proof
+            time (float): time taken by the proof (in seconds)
+        """
+        conclusive = is_pass(res) or res == ProofResult.CEX
+        row = (self.design, property_class(prop_wctx), prop_wctx, engines)
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO timings VALUES (?, ?, ?, ?, ?, ?, ?)",
+                row + (res.name, int(conclusive), time),
+            )
+            self.conn.commit()
+
+    def best(self, pclass: str) -> str:
+        """The engine mix that concluded most proofs of a property class, and
+        the fastest among those
+
+        Returns:
+            str: engine mix ("" for the script's engines, also if nothing was recorded)
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT engines FROM timings WHERE design = ? AND class = ? "
+                + "GROUP BY engines ORDER BY AVG(conclusive) DESC, AVG(time) ASC",
+                (self.design, pclass),
+            ).fetchone()
+        return "" if row is None else row[0]
+
+    def engines(self, prop_wctx: str) -> str:
+        """Engine mix to prove a property with (picked once per class and run)"""
+        pclass = property_class(prop_wctx)
+        if pclass not in self.picked:
+            self.picked[pclass] = self.best(pclass)
+            logger.info(
+                f"Proving {pclass} properties with engines: {self.picked[pclass] or 'default'}"
+            )
+        return self.picked[pclass]
+
+    def tune(
+        self,
+        jgs: JasperSession,
+        prop_wctxs: list[str],
+        mixes: list[str] = None,
+        time_limit: int = 0,
+    ) -> str:
+        """Benchmark engine mixes on properties of the same class
+
+        Args:
+            jgs (JasperSession): session to prove in (with the assumptions of the class set)
+            prop_wctxs (list[str]): hierarchical property names
+            mixes (list[str], optional): engine mixes to benchmark. Defaults to None
+                (the default engines and those in ENGINE_MIXES for the class).
+            time_limit (int, optional): time limit (in seconds) of each proof. Defaults to 0.
+
+        Returns:
+            str: the best engine mix for the class
+        """
+        pclass = property_class(prop_wctxs[0])
+        if mixes is None:
+            mixes = [""] + ENGINE_MIXES[pclass]
+        for engines in mixes:
+            for prop_wctx in prop_wctxs:
+                start = time.time()
+                res = status_result(
+                    jgs.eval(prove_cmd(prop_wctx, time_limit, False, engines))
+                )
+                self.record(prop_wctx, engines, res, time.time() - start)
+                logger.debug(f"Engines {engines or 'default'}: {prop_wctx} {res}")
+        self.picked.pop(pclass, None)
+        return self.best(pclass)
+
+    def close(self):
+        self.conn.close()
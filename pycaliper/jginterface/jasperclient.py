@@ -1,17 +1,33 @@
+import os
+import signal
 import socket
 import sys
 import argparse
 import enum
+import time
 import logging
+import threading
+
+from .sessionstats import SessionStats
 
 logger = logging.getLogger(__name__)
 
 
 DEFAULTHOST = "localhost"
 DEFAULTPORT = 8080
-
-_msgs_sent = 0
-_jgsock = None
+# Hosts whose server processes can be interrupted (abort)
+LOCALHOSTS = ("localhost", "127.0.0.1")
+# Initial size of the receive buffer of a session
+RECV_BUFSIZE = 1 << 16
+# Seconds between checks that an idle session is still connected
+HEARTBEAT_INTERVAL = 30.0
+# Attempts to reconnect a session after losing the connection, and the delay
+# (in seconds, doubled after each failed attempt) between them
+RECONNECT_ATTEMPTS = 5
+RECONNECT_DELAY = 1.0
+# Kinds of commands that are resent after reconnecting: sending them twice
+# leaves the server as sending them once
+RESEND_KINDS = ("assume", "get_status", "pid", "cd")
 
 
 class SocketError(Exception):
@@ -34,38 +50,333 @@ def is_online():
     return MODE == ClientMode.ONLINE
 
 
-def connect_tcp(host: str = DEFAULTHOST, port: int = DEFAULTPORT):
-    # Create a TCP/IP socket
-    global _jgsock
-    _jgsock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    __connect(_jgsock, (host, port))
-
-
-def close_tcp():
-    global _jgsock
-    __close(_jgsock)
-
-
-def shutdown_tcp():
-    global _jgsock
-    __shutdown(_jgsock)
-
-
-def eval(command: str):
-
-    __send_command(_jgsock, command)
-
-    result = __receive_message(_jgsock)
-    if __check_error(result):
-        return result["value"]
-    else:
-        raise JasperError(result["value"])
-
-
-def __connect(sock: socket.socket, server_address):
+class JasperSession:
+    """A session with a Jasper console server (jasperserver.tcl).
+
+    The session owns the socket, the message counters and the client-side
+    view of the assumption state. A session may be shared between threads,
+    commands are serialized on its socket.
+
+    When the connection is lost (e.g., the server restarted), the session
+    reconnects, replays its state (Jasper working directory, loaded script,
+    disabled assumptions) and retries the command if it can be repeated
+    (RESEND_KINDS), other commands fail with a SocketError. A heartbeat
+    checks idle sessions so that a lost connection is restored before the
+    next command.
+    """
+
+    def __init__(self, host: str = DEFAULTHOST, port: int = DEFAULTPORT) -> None:
+        """
+        Args:
+            host (str, optional): host running the Jasper server. Defaults to DEFAULTHOST.
+            port (int, optional): port of the Jasper server. Defaults to DEFAULTPORT.
+        """
+        self.host = host
+        self.port = port
+        self.sock: socket.socket = None
+        # Number of messages (EVAL or BATCH) sent in this session
+        self.msgs_sent = 0
+        # Jasper working directory (relative to the pycaliper directory)
+        self.jwd: str = None
+        # Jasper script loaded in the session (if any)
+        self.script: str = None
+        # (script, design hash, SVA hash) of the loaded design (if known)
+        self.loaded: tuple[str, str, str] = None
+        # Assumptions enabled (True) or disabled (False) through this session
+        self.assms: dict[str, bool] = {}
+        # Proof result cache consulted before proving (if any)
+        self.cache = None
+        # Engine tuner picking the engines of proofs and recording their timings (if any)
+        self.tuner = None
+        # Latency and traffic statistics
+        self.stats = SessionStats()
+        # Default time limit (in seconds) of proofs, 0 for none
+        self.time_limit = 0
+        # Process id of the (local) server, used to abort commands
+        self.pid: int = None
+        # Is a command running
+        self.busy = False
+        # Are commands cancelled (they are not sent until the session resumes)
+        self.cancelled = False
+        # Clients connected to the server, as last reported by its queue depth
+        self.clients: int = None
+        # Number of reconnects (background jobs do not survive them)
+        self.reconnects = 0
+        # Seconds between heartbeats, 0 for none
+        self.heartbeat = HEARTBEAT_INTERVAL
+        # Attempts to reconnect after losing the connection, 0 to not reconnect
+        self.reconnect_attempts = RECONNECT_ATTEMPTS
+        self.rbuf = RecvBuffer()
+        self._lock = threading.Lock()
+        # Guards busy and cancelled
+        self._busy_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def connect(self) -> "JasperSession":
+        # Create a TCP/IP socket
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        _connect(self.sock, (self.host, self.port))
+        if is_online() and self.host in LOCALHOSTS:
+            pid = self.eval("pid")
+            self.pid = int(pid) if pid.isdigit() else None
+        if is_online():
+            self.queue_depth()
+        if is_online() and self.heartbeat > 0:
+            threading.Thread(
+                target=self._beat, name=f"heartbeat-{self.port}", daemon=True
+            ).start()
+        return self
+
+    def _beat(self):
+        while not self._stopped.wait(self.heartbeat):
+            # A busy session is known to be connected
+            if not self._lock.acquire(blocking=False):
+                continue
+            try:
+                if not self._stopped.is_set():
+                    self._depth(_query_queue(self.sock, self.rbuf))
+            except (SocketError, OSError) as e:
+                logger.warning(f"Heartbeat of {self} failed: {e}")
+                try:
+                    self._reconnect()
+                except (SocketError, JasperError) as e:
+                    logger.error(f"Could not reconnect {self}: {e}")
+            finally:
+                self._lock.release()
+
+    def _reconnect(self):
+        # Reconnect and replay the session state, called with the lock held
+        if self.reconnect_attempts == 0:
+            raise SocketError(f"Lost the connection of {self}")
+        delay = RECONNECT_DELAY
+        for attempt in range(1, self.reconnect_attempts + 1):
+            self.sock.close()
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            try:
+                _connect(self.sock, (self.host, self.port))
+                break
+            except SocketError:
+                if attempt == self.reconnect_attempts:
+                    raise
+                logger.warning(
+                    f"Reconnecting {self} failed (attempt {attempt}), retrying in {delay}s"
+                )
+                time.sleep(delay)
+                delay *= 2
+        logger.info(f"Reconnected {self}, restoring the session state")
+        self.reconnects += 1
+
+        commands = ["pid"]
+        if self.jwd is not None:
+            commands.append(f"cd {os.getcwd()}/{self.jwd}")
+        if self.script is not None:
+            commands.append(f"include {self.script}")
+        commands.extend(
+            [f"assume -disable {wctx}" for wctx, en in self.assms.items() if not en]
+        )
+        _send_batch(self.sock, commands)
+        results, _ = _receive_batch(self.sock, len(commands), self.rbuf)
+        errors = [r["value"] for r in results if not _check_error(r)]
+        if errors:
+            raise JasperError(f"Could not restore the state of {self}: {errors}")
+        if self.host in LOCALHOSTS:
+            pid = results[0]["value"]
+            self.pid = int(pid) if pid.isdigit() else None
+
+    def _roundtrip(self, commands, send, receive):
+        # Send a message and receive its response. If the connection was lost,
+        # reconnect and resend once if all its commands can be repeated, the
+        # caller decides about other commands. Called with the lock held.
+        try:
+            sent = send()
+            self.msgs_sent += 1
+            return sent, receive()
+        except (SocketError, OSError) as e:
+            logger.warning(f"Lost the connection of {self}: {e}")
+            self._reconnect()
+            if any(c.partition(" ")[0] not in RESEND_KINDS for c in commands):
+                raise SocketError(
+                    f"Lost the connection of {self} while evaluating {commands}"
+                )
+            sent = send()
+            self.msgs_sent += 1
+            return sent, receive()
+
+    def abort(self):
+        """Interrupt the running command (e.g., a proof) from another thread.
+        Jasper stops the proof as on Ctrl-C and the proof returns an
+        inconclusive result. Only servers on the local host that serve this
+        session alone can be interrupted (the interrupt stops whatever job
+        the server is running).
+
+        Raises:
+            JasperError: if the server process is not known or the server is shared
+        """
+        if self.pid is None:
+            raise JasperError(
+                f"Cannot abort commands in {self}: unknown server process"
+            )
+        if self.clients != 1:
+            raise JasperError(
+                f"Cannot abort commands in {self}: the server has {self.clients} clients"
+            )
+        if self.busy:
+            logger.info(f"Aborting the running command in {self}")
+            os.kill(self.pid, signal.SIGINT)
+
+    def cancel(self):
+        """Cancel the commands of the session from another thread: the running
+        command is aborted (see abort) and later commands fail without being
+        sent, until the session resumes.
+
+        Raises:
+            JasperError: if the running command cannot be aborted
+        """
+        with self._busy_lock:
+            self.cancelled = True
+            running = self.busy
+        if running:
+            self.abort()
+
+    def resume(self):
+        """Send commands again after cancel"""
+        with self._busy_lock:
+            self.cancelled = False
+
+    def _dispatch(self):
+        # Mark the session busy before sending a command, unless cancelled.
+        # Called with the lock held.
+        with self._busy_lock:
+            if self.cancelled:
+                raise JasperError(f"Commands of {self} were cancelled")
+            self.busy = True
+
+    def close(self):
+        self._stopped.set()
+        with self._lock:
+            _close(self.sock)
+
+    def shutdown(self):
+        self._stopped.set()
+        with self._lock:
+            _shutdown(self.sock)
+
+    def eval(self, command: str) -> str:
+        """Evaluate a command
+
+        Args:
+            command (str): command to evaluate
+
+        Raises:
+            JasperError: if the command failed
+            SocketError: if the connection was lost and the command cannot be resent
+
+        Returns:
+            str: result of the command
+        """
+        with self._lock:
+            start = time.perf_counter()
+            self._dispatch()
+            try:
+                sent, result = self._roundtrip(
+                    [command],
+                    lambda: _send_command(self.sock, command),
+                    lambda: _receive_message(self.sock, self.rbuf),
+                )
+            finally:
+                self.busy = False
+            self.stats.record(
+                [command], time.perf_counter() - start, sent, result["size"]
+            )
+        if _check_error(result):
+            return result["value"]
+        else:
+            raise JasperError(result["value"])
+
+    def eval_batch(self, commands: list[str]) -> list[str]:
+        """Evaluate a batch of commands in a single round trip
+
+        Args:
+            commands (list[str]): commands to evaluate (in order)
+
+        Raises:
+            JasperError: if any command in the batch failed
+            SocketError: if the connection was lost and the batch cannot be resent
+
+        Returns:
+            list[str]: results of the commands
+        """
+        if not commands:
+            return []
+
+        with self._lock:
+            start = time.perf_counter()
+            self._dispatch()
+            try:
+                sent, (results, received) = self._roundtrip(
+                    commands,
+                    lambda: _send_batch(self.sock, commands),
+                    lambda: _receive_batch(self.sock, len(commands), self.rbuf),
+                )
+            finally:
+                self.busy = False
+            self.stats.record(commands, time.perf_counter() - start, sent, received)
+        errors = [r["value"] for r in results if not _check_error(r)]
+        if errors:
+            raise JasperError("\n".join(errors))
+        return [r["value"] for r in results]
+
+    def queue_depth(self) -> dict[str, int]:
+        """Queue depth of the server, answered without waiting for the queued
+        commands: connected clients, queued commands (of all clients) and
+        queued commands of this session (client_jobs)
+
+        Returns:
+            dict[str, int]: queue depth by name
+        """
+        with self._lock:
+            return self._depth(_query_queue(self.sock, self.rbuf))
+
+    def _depth(self, reply: str) -> dict[str, int]:
+        words = reply.split()
+        depth = {k: int(v) for k, v in zip(words[::2], words[1::2])}
+        self.clients = depth.get("clients")
+        return depth
+
+    def __str__(self) -> str:
+        return f"JasperSession({self.host}:{self.port})"
+
+
+class RecvBuffer:
+    """Preallocated receive buffer, grown (doubled) when a larger frame arrives"""
+
+    def __init__(self, size: int = RECV_BUFSIZE) -> None:
+        self.buf = bytearray(size)
+
+    def recv(self, sock: socket.socket, n: int) -> memoryview:
+        """Receive exactly n bytes into the buffer
+
+        Returns:
+            memoryview: view of the received bytes (valid until the next recv)
+        """
+        if n > len(self.buf):
+            self.buf = bytearray(max(n, 2 * len(self.buf)))
+        view = memoryview(self.buf)[:n]
+        pos = 0
+        while pos < n:
+            nbytes = sock.recv_into(view[pos:], n - pos)
+            if nbytes == 0:
+                raise SocketError("Jasper console server closed the connection")
+            pos += nbytes
+        return view
+
+
+def _connect(sock: socket.socket, server_address):
     if is_online():
         try:
             sock.connect(server_address)
+            # Frames are sent with a single write, do not wait to coalesce them
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         except socket.error:
             raise SocketError(
                 f"Unable to connect to Jasper console server at {str(server_address)}"
@@ -74,61 +385,111 @@ def __connect(sock: socket.socket, server_address):
         logger.info(f"Connecting to {server_address}, but in SIM mode. Not connecting.")
 
 
-def __close(sock: socket.socket):
+def _frame(data: bytes) -> bytes:
+    # Prefix data with its 8 hex digit length
+    return b"%08x" % len(data) + data
+
+
+def _request(action: str, body: bytes = b"") -> bytes:
+    return _frame(action.encode("utf-8") + b"\n" + body)
+
+
+def _close(sock: socket.socket):
     if is_online():
-        sock.sendall("CLOSE".encode("utf-8") + b"\n")
+        sock.sendall(_request("CLOSE"))
         sock.close()
     else:
         logger.info(f"Closing socket, but in SIM mode. Not closing.")
 
 
-def __shutdown(sock: socket.socket):
+def _shutdown(sock: socket.socket):
     if is_online():
-        sock.sendall("SHUTDOWN".encode("utf-8") + b"\n")
+        sock.sendall(_request("SHUTDOWN"))
         sock.close()
     else:
         logger.info(f"Shutting down socket, but in SIM mode. Not shutting down.")
 
 
-def __send_command(sock: socket.socket, cmd: str):
-    global _msgs_sent
+def _send_command(sock: socket.socket, cmd: str) -> int:
+    # Returns the number of bytes sent
     if is_online():
-        sock.sendall("EVAL".encode("utf-8") + b"\n")
-        sock.sendall(cmd.encode("utf-8") + b"\n")
+        msg = _request("EVAL", cmd.encode("utf-8"))
+        sock.sendall(msg)
+        return len(msg)
     else:
         logger.debug(f"Sending command: {cmd}, but in SIM mode. Not sending.")
+        return 0
+
+
+def _send_batch(sock: socket.socket, cmds: list[str]) -> int:
+    # Returns the number of bytes sent
+    if is_online():
+        msg = _request("BATCH", b"".join([_frame(c.encode("utf-8")) for c in cmds]))
+        sock.sendall(msg)
+        return len(msg)
+    else:
+        logger.debug(f"Sending batch: {cmds}, but in SIM mode. Not sending.")
+        return 0
 
-    _msgs_sent += 1
 
+def _query_queue(sock: socket.socket, rbuf: RecvBuffer) -> str:
+    if is_online():
+        sock.sendall(_request("QUEUE"))
+        return _receive_message(sock, rbuf)["value"]
+    else:
+        logger.debug(f"Querying queue depth, but in SIM mode. Not querying.")
+        return "clients 0 jobs 0 client_jobs 0"
 
-def __receive_message(sock: socket.socket):
 
+def _receive_batch(sock: socket.socket, count: int, rbuf: RecvBuffer):
+    # Returns the results and the number of bytes received
     if is_online():
-        # Receive single character return code and 8 byte message length
-        errorlenbuf = b""
-        while len(errorlenbuf) < 9:
-            errorlenbuf += sock.recv(9 - len(errorlenbuf))
-
-        # Decode error code and message length
-        errcode = errorlenbuf[0:1].decode("utf-8")
-        msglen = int(errorlenbuf[1:].decode("utf-8"), 16)
-
-        # Message length plus the 2 byte carriage return and newline
-        bytes_left = msglen + 2
-        chunks = []
-        while bytes_left > 0:
-            chunk = sock.recv(bytes_left)
-            chunks.append(chunk)
-            bytes_left -= len(chunk)
-        msgrecv = (b"".join(chunks)[:-2]).decode("utf-8")
-
-        return {"error": errcode, "length": msglen, "value": msgrecv}
+        _, payload = _receive_frame(sock, rbuf)
+        return _parse_batch(payload, count), 9 + len(payload)
+    else:
+        logger.debug(f"Receiving batch, but in SIM mode. Not receiving.")
+        return [{"error": "0", "length": 0, "value": "SIM"} for _ in range(count)], 0
+
+
+def _parse_batch(payload: bytes, count: int):
+    # The batch payload is a sequence of result frames, each with the
+    # same error code and length header as a single message
+    results = []
+    pos = 0
+    for _ in range(count):
+        errcode = chr(payload[pos])
+        msglen = int(bytes(payload[pos + 1 : pos + 9]), 16)
+        value = bytes(payload[pos + 9 : pos + 9 + msglen]).decode("utf-8")
+        results.append({"error": errcode, "length": msglen, "value": value})
+        pos += 9 + msglen
+    return results
+
+
+def _receive_frame(sock: socket.socket, rbuf: RecvBuffer):
+    # Single character return code and 8 hex digit payload length
+    header = rbuf.recv(sock, 9)
+    errcode = chr(header[0])
+    msglen = int(bytes(header[1:]), 16)
+    return errcode, rbuf.recv(sock, msglen)
+
+
+def _receive_message(sock: socket.socket, rbuf: RecvBuffer):
+
+    if is_online():
+        errcode, payload = _receive_frame(sock, rbuf)
+        msgrecv = bytes(payload).decode("utf-8")
+        return {
+            "error": errcode,
+            "length": len(payload),
+            "value": msgrecv,
+            "size": 9 + len(payload),
+        }
     else:
         logger.debug(f"Receiving message, but in SIM mode. Not receiving.")
-        return {"error": "0", "length": 0, "value": "SIM"}
+        return {"error": "0", "length": 0, "value": "SIM", "size": 0}
 
 
-def __check_error(result):
+def _check_error(result):
     # Hit an error code
     if result["error"] != "0":
         logger.error(f"Error {result['error']}: {result['value']}")
@@ -157,24 +518,24 @@ def main(args):
     )
     args = argparser.parse_args(args)
 
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        __connect(s, (args.host, args.port))
-        data = input("jg_server (cmd|close|shutdown)> ")
-        while True:
-            if not data:
+    jgs = JasperSession(args.host, args.port).connect()
+    data = input("jg_server (cmd|close|shutdown)> ")
+    while True:
+        if not data:
+            pass
+        elif data.lower() == "close":
+            jgs.close()
+            break
+        elif data.lower() == "shutdown":
+            jgs.shutdown()
+            break
+        else:
+            try:
+                print(f"{jgs.eval(data)}")
+            except JasperError:
+                # Already logged
                 pass
-            elif data.lower() == "close":
-                __close(s)
-                break
-            elif data.lower() == "shutdown":
-                __shutdown(s)
-                break
-            else:
-                __send_command(s, data)
-                result = __receive_message(s)
-                if __check_error(result):
-                    print(f"{result['value']}")
-            data = input("jg_server> ")
+        data = input("jg_server> ")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,219 @@
+"""
+    Pool of Jasper sessions for dispatching proofs in parallel
+"""
+
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+
+from .jasperclient import JasperSession, JasperError, SocketError, DEFAULTHOST
+from .jgoracle import prove, prove_many, prove_wctx, get_wctx, is_pass, ProofResult
+from .sessionstats import SessionStats
+
+logger = logging.getLogger(__name__)
+
+
+def _race(
+    jgs: JasperSession, prop_wctx: str, time_limit: int, engines: str
+) -> ProofResult:
+    # Whether the proof can be aborted depends on the other clients of the server
+    jgs.queue_depth()
+    return prove_wctx(jgs, prop_wctx, True, time_limit, engines)
+
+
+class JasperPool:
+    """A pool of Jasper sessions (one per server port) that mirror the state
+    of the main session and dispatch proofs concurrently."""
+
+    def __init__(
+        self,
+        ports: list[int],
+        host: str = DEFAULTHOST,
+        factory=JasperSession,
+        snapshot: str = "",
+    ) -> None:
+        """
+        Args:
+            ports (list[int]): ports of the Jasper servers in the pool
+            host (str, optional): host running the servers. Defaults to DEFAULTHOST.
+            factory (optional): creates a session from (host, port). Defaults to JasperSession.
+            snapshot (str, optional): path of the snapshot the sessions restore the
+                design loaded in the main session from. Defaults to "" (load the
+                design in every session).
+        """
+        self.snapshot = snapshot
+        self.sessions = [factory(host, port).connect() for port in ports]
+        # Sessions that are not running a proof
+        self.free: queue.Queue = queue.Queue()
+        for jgs in self.sessions:
+            self.free.put(jgs)
+        self.executor = ThreadPoolExecutor(
+            max_workers=len(self.sessions), thread_name_prefix="jgpool"
+        )
+        logger.info(f"Connected Jasper pool with {len(self.sessions)} sessions.")
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def _run(self, fn, *args):
+        jgs = self.free.get()
+        try:
+            return fn(jgs, *args)
+        finally:
+            self.free.put(jgs)
+
+    def submit(self, fn, *args) -> Future:
+        """Run fn(<session>, *args) on the next free session in the pool"""
+        return self.executor.submit(self._run, fn, *args)
+
+    def prove(
+        self, taskcon: str, prop: str, time_limit: int = None
+    ) -> "Future[ProofResult]":
+        """Prove a property on the next free session in the pool
+
+        Args:
+            taskcon (str): proof node the property is defined under
+            prop (str): property name
+            time_limit (int, optional): time limit (in seconds) of the proof.
+                Defaults to None (the session's time limit).
+
+        Returns:
+            Future[ProofResult]: future for the result of the proof
+        """
+        return self.submit(prove, taskcon, prop, time_limit)
+
+    def prove_many(
+        self,
+        taskcon: str,
+        props: list[str],
+        time_limit: int = None,
+        engines: str = None,
+    ) -> list[ProofResult]:
+        """Prove properties split into one multi-property proof per session
+
+        Args:
+            taskcon (str): proof node the properties are defined under
+            props (list[str]): property names
+            time_limit (int, optional): time limit (in seconds) of each proof job.
+                Defaults to None (the session's time limit).
+            engines (str, optional): Jasper engines to prove with. Defaults to None
+                (picked by the sessions' tuner, if any).
+
+        Returns:
+            list[ProofResult]: result of the proof of each property (in order)
+        """
+        n = len(self.sessions)
+        chunks = [props[i::n] for i in range(n) if props[i::n]]
+        futures = [
+            self.submit(prove_many, taskcon, chunk, time_limit, engines)
+            for chunk in chunks
+        ]
+        results = {}
+        for chunk, f in zip(chunks, futures):
+            results.update(zip(chunk, f.result()))
+        return [results[prop] for prop in props]
+
+    def broadcast(self, fn, *args) -> list:
+        """Run fn(<session>, *args) on every session in the pool. This waits
+        for in-flight proofs to complete so that all sessions stay in the same state.
+
+        Returns:
+            list: results of fn for each session
+        """
+        sessions = [self.free.get() for _ in self.sessions]
+        try:
+            return [fn(jgs, *args) for jgs in sessions]
+        finally:
+            for jgs in sessions:
+                self.free.put(jgs)
+
+    def race(
+        self,
+        jgs: JasperSession,
+        taskcon: str,
+        prop: str,
+        mixes: list[str],
+        time_limit: int = None,
+    ) -> ProofResult:
+        """Race proofs of a property with different engine mixes, one per session
+        (the main session first, then the sessions in the pool). The first
+        conclusive result wins and the other proofs are cancelled: those that
+        did not start are not sent, running ones are aborted (on servers that
+        serve a single client).
+
+        Args:
+            jgs (JasperSession): main session (in the same state as the pool)
+            taskcon (str): proof node the property is defined under
+            prop (str): property name
+            mixes (list[str]): engine mixes to race (extra mixes beyond the
+                number of sessions are not run)
+            time_limit (int, optional): time limit (in seconds) of the proofs.
+                Defaults to None (the sessions' time limit).
+
+        Raises:
+            JasperError: if every racer failed (the error of the last one, also SocketError)
+
+        Returns:
+            ProofResult: the first conclusive result (UNKNOWN if there is none)
+        """
+        prop_wctx = get_wctx(taskcon, f"P_{prop}")
+        sessions = [self.free.get() for _ in self.sessions]
+        racers = list(zip([jgs] + sessions, mixes))
+        result = ProofResult.UNKNOWN
+        try:
+            with ThreadPoolExecutor(
+                max_workers=len(racers), thread_name_prefix="jgrace"
+            ) as executor:
+                futures: dict[Future, tuple[JasperSession, str]] = {}
+                for s, mix in racers:
+                    f = executor.submit(_race, s, prop_wctx, time_limit, mix)
+                    futures[f] = (s, mix)
+                failed = []
+                for f in as_completed(futures):
+                    try:
+                        res = f.result()
+                    except (JasperError, SocketError) as e:
+                        # The other racers may still conclude
+                        logger.warning(f"Engines {futures[f][1]} failed: {e}")
+                        failed.append(e)
+                        continue
+                    if is_pass(res) or res == ProofResult.CEX:
+                        winner, mix = futures[f]
+                        logger.info(f"Engines {mix} won the race for {prop_wctx}")
+                        result = res
+                        self._cancel_racers([s for s, _ in racers if s is not winner])
+                        break
+                # Leaving the executor waits for the aborted proofs to return
+            if len(failed) == len(racers):
+                raise failed[-1]
+        finally:
+            for s, _ in racers:
+                s.resume()
+            for s in sessions:
+                self.free.put(s)
+        return result
+
+    def _cancel_racers(self, racers: list[JasperSession]):
+        for jgs in racers:
+            try:
+                jgs.cancel()
+            except JasperError as e:
+                logger.warning(f"Cannot abort the losing proof, waiting for it: {e}")
+
+    def stats(self) -> SessionStats:
+        """Statistics of all sessions in the pool combined"""
+        stats = SessionStats()
+        for jgs in self.sessions:
+            stats.merge(jgs.stats)
+        return stats
+
+    def abort(self):
+        """Abort the proofs running in the pool"""
+        for jgs in self.sessions:
+            jgs.abort()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        for jgs in self.sessions:
+            jgs.close()
+        logger.info("Jasper pool closed.")
@@ -0,0 +1,188 @@
+"""
+    Record and replay of Jasper sessions
+
+    A RecordingSession writes every round trip (command(s), result(s), time
+    taken) to a log with one compact JSON object per line. A ReplaySession
+    serves the results from such a log without a Jasper server, so that a
+    production run can be repeated offline as a benchmark of the client side.
+"""
+
+import os
+import re
+import gzip
+import json
+import time
+import logging
+import threading
+
+from .jasperclient import JasperSession, JasperError, DEFAULTHOST, DEFAULTPORT
+
+logger = logging.getLogger(__name__)
+
+
+# Saving a VCD trace writes a file that has to be recreated on replay
+VCD_SAVE = re.compile(r"-vcd\s+(\S+)")
+# Snapshots are saved to the (run-specific) pycaliper working directory
+JDB_PATH = re.compile(r"-jdb\s+(\S+)")
+
+
+def command_key(command: str) -> str:
+    """Normalize the run-specific parts of a command (working directory, trace
+    and snapshot paths) so that a replayed run matches the recorded one"""
+    command = command.replace(os.getcwd(), "$PWD")
+    command = JDB_PATH.sub("-jdb $JDB", command)
+    return VCD_SAVE.sub("-vcd $VCD", command)
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class SessionLog:
+    """Log of round trips shared by all sessions of a run (gzip compressed if
+    the path ends with .gz)"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file = _open(path, "w")
+        self._lock = threading.Lock()
+
+    def write(self, entry: dict):
+        with self._lock:
+            self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def close(self):
+        with self._lock:
+            self.file.close()
+
+
+class RecordingSession(JasperSession):
+    """A Jasper session that records every round trip to a SessionLog"""
+
+    def __init__(
+        self, log: SessionLog, host: str = DEFAULTHOST, port: int = DEFAULTPORT
+    ) -> None:
+        super().__init__(host, port)
+        self.log = log
+
+    def _record(self, entry: dict, command: str):
+        vcd = VCD_SAVE.search(command)
+        if vcd is not None and os.path.isfile(vcd.group(1)):
+            with open(vcd.group(1), "r") as f:
+                entry["f"] = f.read()
+        self.log.write(entry)
+
+    def eval(self, command: str) -> str:
+        entry = {"c": command_key(command)}
+        start = time.perf_counter()
+        try:
+            entry["r"] = super().eval(command)
+            return entry["r"]
+        except JasperError as e:
+            entry["x"] = str(e)
+            raise
+        finally:
+            entry["t"] = round(time.perf_counter() - start, 6)
+            self._record(entry, command)
+
+    def eval_batch(self, commands: list[str]) -> list[str]:
+        if not commands:
+            return []
+        entry = {"b": [command_key(c) for c in commands]}
+        start = time.perf_counter()
+        try:
+            entry["r"] = super().eval_batch(commands)
+            return entry["r"]
+        except JasperError as e:
+            entry["x"] = str(e)
+            raise
+        finally:
+            entry["t"] = round(time.perf_counter() - start, 6)
+            self._record(entry, "\n".join(commands))
+
+
+class ReplayLog:
+    """Recorded responses indexed by (normalized) command. Responses to the same
+    command are served in recorded order, the last one is repeated once they
+    run out (e.g., when replaying with more pool sessions than were recorded)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.entries: dict[str, list[dict]] = {}
+        self._lock = threading.Lock()
+        with _open(path, "r") as f:
+            for line in f:
+                entry = json.loads(line)
+                key = entry["c"] if "c" in entry else "\n".join(entry["b"])
+                self.entries.setdefault(key, []).append(entry)
+        logger.info(f"Loaded {len(self.entries)} recorded commands from {path}.")
+
+    def next(self, key: str) -> dict:
+        with self._lock:
+            entries = self.entries.get(key)
+            if not entries:
+                raise JasperError(f"No recorded response for: {key}")
+            return entries.pop(0) if len(entries) > 1 else entries[0]
+
+
+class ReplaySession(JasperSession):
+    """A Jasper session that serves recorded responses instead of connecting
+    to a Jasper server"""
+
+    def __init__(
+        self,
+        log: ReplayLog,
+        host: str = DEFAULTHOST,
+        port: int = DEFAULTPORT,
+        speed: float = 0.0,
+    ) -> None:
+        """
+        Args:
+            log (ReplayLog): recorded responses
+            host (str, optional): host of the recorded session. Defaults to DEFAULTHOST.
+            port (int, optional): port of the recorded session. Defaults to DEFAULTPORT.
+            speed (float, optional): fraction of the recorded time to wait for each
+                response (0 replays as fast as possible). Defaults to 0.0.
+        """
+        super().__init__(host, port)
+        self.log = log
+        self.speed = speed
+
+    def connect(self) -> "ReplaySession":
+        return self
+
+    def close(self):
+        pass
+
+    def shutdown(self):
+        pass
+
+    def _replay(self, command: str, key: str) -> dict:
+        with self._lock:
+            start = time.perf_counter()
+            entry = self.log.next(key)
+            self.msgs_sent += 1
+            if self.speed > 0:
+                time.sleep(entry["t"] * self.speed)
+            self.stats.record(key.split("\n"), time.perf_counter() - start, 0, 0)
+        vcd = VCD_SAVE.search(command)
+        if vcd is not None and "f" in entry:
+            with open(vcd.group(1), "w") as f:
+                f.write(entry["f"])
+        if "x" in entry:
+            raise JasperError(entry["x"])
+        return entry
+
+    def eval(self, command: str) -> str:
+        return self._replay(command, command_key(command))["r"]
+
+    def eval_batch(self, commands: list[str]) -> list[str]:
+        if not commands:
+            return []
+        key = "\n".join([command_key(c) for c in commands])
+        return self._replay("\n".join(commands), key)["r"]
+
+    def __str__(self) -> str:
+        return f"ReplaySession({self.log.path})"
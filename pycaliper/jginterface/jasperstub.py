@@ -0,0 +1,328 @@
+"""
+    Stand-in for the Jasper console server (jasperserver.tcl)
+
+    Speaks the same wire protocol as jasperserver.tcl, but answers commands
+    from a script instead of running Jasper: commands take a configurable
+    time, prove results are picked by property name patterns, commands can
+    be made to fail and results can be padded to a given size. This allows
+    load testing the client side of pycaliper without a Jasper licence.
+"""
+
+import re
+import sys
+import time
+import socket
+import fnmatch
+import argparse
+import logging
+import threading
+import socketserver
+
+from .jasperclient import DEFAULTHOST, DEFAULTPORT
+
+logger = logging.getLogger(__name__)
+
+
+def command_kind(command: str) -> str:
+    """The kind of a command is its first word (e.g. prove, assume, include)"""
+    words = command.split(maxsplit=1)
+    return words[0] if words else ""
+
+
+def _result_frame(errcode: str, result: str) -> bytes:
+    data = result.encode("utf-8")
+    return errcode.encode("utf-8") + b"%08x" % len(data) + data
+
+
+class _StubHandler(socketserver.StreamRequestHandler):
+    def _read_frame(self) -> bytes:
+        header = self.rfile.read(8)
+        if len(header) != 8:
+            return None
+        payload = self.rfile.read(int(header, 16))
+        return payload
+
+    def _send(self, frame: bytes):
+        self.wfile.write(frame)
+
+    def handle(self):
+        stub: JasperStub = self.server.stub
+        logger.info(f"Accepted connection from {self.client_address}")
+        with stub._lock:
+            stub.clients += 1
+            stub.connections.add(self.request)
+        try:
+            self._serve(stub)
+        except OSError:
+            # Connection dropped by stop
+            pass
+        finally:
+            with stub._lock:
+                stub.clients -= 1
+                stub.connections.discard(self.request)
+        logger.info(f"Connection from {self.client_address} closed.")
+
+    def _serve(self, stub: "JasperStub"):
+        while (payload := self._read_frame()) is not None:
+            action, _, body = payload.partition(b"\n")
+            if action == b"CLOSE":
+                break
+            elif action == b"SHUTDOWN":
+                threading.Thread(target=stub.stop).start()
+                break
+            elif action == b"QUEUE":
+                time.sleep(stub.latency.get("QUEUE", 0.0))
+                # Commands of a connection are served as they arrive
+                depth = f"clients {stub.clients} jobs 0 client_jobs 0"
+                self._send(_result_frame("0", depth))
+            elif action == b"EVAL":
+                self._send(stub.eval_command(body.decode("utf-8")))
+            elif action == b"BATCH":
+                # Sequence of length prefixed commands
+                frames = []
+                pos = 0
+                while pos < len(body):
+                    cmdlen = int(body[pos : pos + 8], 16)
+                    command = body[pos + 8 : pos + 8 + cmdlen].decode("utf-8")
+                    frames.append(stub.eval_command(command))
+                    pos += 8 + cmdlen
+                payload = b"".join(frames)
+                self._send(b"0%08x" % len(payload) + payload)
+
+
+class _StubTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class JasperStub:
+    """A scripted stand-in for a Jasper console server"""
+
+    def __init__(
+        self,
+        port: int = DEFAULTPORT,
+        host: str = DEFAULTHOST,
+        latency: dict[str, float] = None,
+        default_latency: float = 0.0,
+        outcomes: list[tuple[str, str]] = None,
+        default_outcome: str = "proven",
+        sizes: dict[str, int] = None,
+        durations: list[tuple[str, float]] = None,
+        errors: list[str] = None,
+    ) -> None:
+        """
+        Args:
+            port (int, optional): port to serve on (0 picks a free port). Defaults to DEFAULTPORT.
+            host (str, optional): host to serve on. Defaults to DEFAULTHOST.
+            latency (dict[str, float], optional): time (in seconds) taken by each command
+                kind (and by QUEUE queries). Defaults to None (no latency).
+            default_latency (float, optional): time taken by other commands. Defaults to 0.0.
+            outcomes (list[tuple[str, str]], optional): (property glob pattern, result) pairs
+                for prove commands, the first matching pattern wins. Defaults to None
+                (all properties get the default outcome).
+            default_outcome (str, optional): result for unmatched properties. Defaults to "proven".
+            sizes (dict[str, int], optional): result size (in characters) of each command kind.
+                Defaults to None (results are not padded).
+            durations (list[tuple[str, float]], optional): (property glob pattern, seconds) pairs,
+                proofs take the longest time of their properties on top of the prove latency,
+                properties that take longer than the time limit of a prove are undetermined.
+                Defaults to None (proofs take the prove latency).
+            errors (list[str], optional): glob patterns of commands that fail. Defaults to None
+                (no command fails).
+        """
+        self.latency = {} if latency is None else latency
+        self.default_latency = default_latency
+        self.outcomes = [] if outcomes is None else outcomes
+        self.default_outcome = default_outcome
+        self.sizes = {} if sizes is None else sizes
+        self.durations = [] if durations is None else durations
+        self.errors = [] if errors is None else errors
+
+        # Number of commands served by kind
+        self.counts: dict[str, int] = {}
+        # Number of connected clients and their connections
+        self.clients = 0
+        self.connections: set[socket.socket] = set()
+        # Status of the properties proven so far (get_status) and the time
+        # at which it is known (later for background proofs)
+        self.status: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+        self.server = _StubTCPServer((host, port), _StubHandler)
+        self.server.stub = self
+        self.port = self.server.server_address[1]
+        self._thread: threading.Thread = None
+
+    def outcome(self, prop: str) -> str:
+        """Scripted result of proving a property"""
+        for pattern, result in self.outcomes:
+            if fnmatch.fnmatchcase(prop, pattern):
+                return result
+        return self.default_outcome
+
+    def duration(self, prop: str) -> float:
+        """Scripted time taken by the proof of a property"""
+        for pattern, seconds in self.durations:
+            if fnmatch.fnmatchcase(prop, pattern):
+                return seconds
+        return 0.0
+
+    def prove_result(self, command: str) -> str:
+        """Scripted result of a (multi-property) prove command: a cex if any
+        property has one, otherwise the result of the first property. Background
+        proofs (-bg) return at once, their status is known once they would end."""
+        props = re.search(r"-property\s+\{([^}]*)\}", command)
+        props = props.group(1).split() if props else [""]
+        limit = re.search(r"-time_limit\s+(\d+)s", command)
+        limit = float(limit.group(1)) if limit else float("inf")
+        durations = [self.duration(prop) for prop in props]
+        results = [
+            self.outcome(prop) if d <= limit else "undetermined"
+            for prop, d in zip(props, durations)
+        ]
+        now = time.time()
+        ends = [now + min(d, limit) for d in durations]
+        with self._lock:
+            self.status.update(zip(props, zip(results, ends)))
+        if re.search(r"\s-bg\b", command):
+            return ""
+        time.sleep(min(max(durations), limit))
+        return "cex" if "cex" in results else results[0]
+
+    def get_status(self, prop: str) -> str:
+        with self._lock:
+            result, end = self.status.get(prop, ("unknown", 0.0))
+        return result if time.time() >= end else "unknown"
+
+    def eval_command(self, command: str) -> bytes:
+        """Evaluate a command and return its result frame"""
+        kind = command_kind(command)
+        with self._lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+        time.sleep(self.latency.get(kind, self.default_latency))
+        if any(fnmatch.fnmatchcase(command, pattern) for pattern in self.errors):
+            return _result_frame("1", f"Error in command: {command}")
+        if kind == "prove":
+            result = self.prove_result(command)
+        elif kind == "get_status":
+            result = self.get_status(command.split()[-1])
+        elif kind == "set":
+            # As in Tcl, set returns the value
+            words = command.split(maxsplit=2)
+            result = words[2] if len(words) == 3 else ""
+        else:
+            result = "x" * self.sizes.get(kind, 0)
+        return _result_frame("0", result)
+
+    def start(self) -> "JasperStub":
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Jasper stub started on port {self.port}")
+        return self
+
+    def serve_forever(self):
+        logger.info(f"Jasper stub started on port {self.port}")
+        self.server.serve_forever()
+
+    def stop(self):
+        """Stop serving and drop the connected clients"""
+        self.server.shutdown()
+        self.server.server_close()
+        with self._lock:
+            for conn in self.connections:
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        logger.info(f"Jasper stub on port {self.port} stopped.")
+
+
+def _parse_pairs(pairs: list[str]) -> list[tuple[str, str]]:
+    return [tuple(p.rsplit("=", 1)) for p in pairs]
+
+
+def main(args):
+
+    argparser = argparse.ArgumentParser(description="Jasper console server stand-in")
+
+    argparser.add_argument(
+        "-p",
+        "--port",
+        type=int,
+        nargs="+",
+        help="Port number(s) to serve on (one server per port)",
+        default=[DEFAULTPORT],
+    )
+    argparser.add_argument(
+        "-H",
+        "--host",
+        type=str,
+        help="Host name to serve on",
+        default=DEFAULTHOST,
+    )
+    argparser.add_argument(
+        "--latency",
+        nargs="*",
+        default=[],
+        help="Latency in seconds per command kind: <kind>=<seconds>",
+    )
+    argparser.add_argument(
+        "--default-latency",
+        type=float,
+        default=0.0,
+        help="Latency in seconds of other commands",
+    )
+    argparser.add_argument(
+        "--outcome",
+        nargs="*",
+        default=[],
+        help="Prove result per property pattern: <pattern>=<result>",
+    )
+    argparser.add_argument(
+        "--default-outcome",
+        type=str,
+        default="proven",
+        help="Prove result of unmatched properties",
+    )
+    argparser.add_argument(
+        "--duration",
+        nargs="*",
+        default=[],
+        help="Proof time in seconds per property pattern: <pattern>=<seconds>",
+    )
+    argparser.add_argument(
+        "--error",
+        nargs="*",
+        default=[],
+        help="Glob patterns of commands that fail",
+    )
+    argparser.add_argument(
+        "--size",
+        nargs="*",
+        default=[],
+        help="Result size in characters per command kind: <kind>=<size>",
+    )
+    args = argparser.parse_args(args)
+
+    stubs = [
+        JasperStub(
+            port=port,
+            host=args.host,
+            latency={k: float(v) for k, v in _parse_pairs(args.latency)},
+            default_latency=args.default_latency,
+            outcomes=_parse_pairs(args.outcome),
+            default_outcome=args.default_outcome,
+            sizes={k: int(v) for k, v in _parse_pairs(args.size)},
+            durations=[(k, float(v)) for k, v in _parse_pairs(args.duration)],
+            errors=args.error,
+        ).start()
+        for port in args.port
+    ]
+    for stub in stubs:
+        stub._thread.join()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main(sys.argv[1:])
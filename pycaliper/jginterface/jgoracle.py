@@ -1,9 +1,11 @@
 import enum
 import logging
 import os
+import time
 
-from . import jasperclient as jgc
-from ..svagen import SVAContext
+from .jasperclient import JasperSession, JasperError
+from .designhash import files_hash, design_hash
+from ..svagen import SVAContext, spec_files
 
 logger = logging.getLogger(__name__)
 
@@ -21,22 +23,313 @@ class ProofResult(enum.Enum):
         return self.name
 
 
-def prove(taskcon: str, prop: str) -> ProofResult:
+def prove(
+    jgs: JasperSession, taskcon: str, prop: str, time_limit: int = None
+) -> ProofResult:
     """Prove a property
 
     Args:
+        jgs (JasperSession): session to prove in
         taskcon (str): proof node the property is defined under
         prop (str): property name
+        time_limit (int, optional): time limit (in seconds) of the proof, 0 for
+            none. Defaults to None (the session's time limit).
 
     Returns:
-        ProofResult: result of the proof
+        ProofResult: result of the proof (UNKNOWN if it ran out of time)
     """
-    prop_wctx = get_wctx(taskcon, f"P_{prop}")
+    return prove_wctx(jgs, get_wctx(taskcon, f"P_{prop}"), time_limit=time_limit)
+
+
+def prove_wctx(
+    jgs: JasperSession,
+    prop_wctx: str,
+    use_cache=True,
+    time_limit: int = None,
+    engines: str = None,
+) -> ProofResult:
+    """Prove a property given its hierarchical name
+
+    Args:
+        jgs (JasperSession): session to prove in
+        prop_wctx (str): hierarchical property name
+        use_cache (bool, optional): consult the session's proof cache (if any). Defaults to True.
+        time_limit (int, optional): time limit (in seconds) of the proof, 0 for
+            none. Defaults to None (the session's time limit).
+        engines (str, optional): Jasper engines to prove with ("" for the default
+            engines). Defaults to None (picked by the session's tuner, if any).
+
+    Returns:
+        ProofResult: result of the proof (UNKNOWN if it ran out of time)
+    """
+    if time_limit is None:
+        time_limit = jgs.time_limit
+    cache = jgs.cache if use_cache else None
+    if cache is not None:
+        res = cache.lookup(jgs, prop_wctx)
+        if res is not None:
+            return res
+    tuner = jgs.tuner if engines is None else None
+    if tuner is not None:
+        engines = tuner.engines(prop_wctx)
     logger.debug(f"Proving property: {prop_wctx}")
-    cmd = f"prove -property {{ {prop_wctx} }}"
-    res: str = jgc.eval(cmd)
+    start = time.time()
+    res = status_result(jgs.eval(prove_cmd(prop_wctx, time_limit, engines=engines)))
+    elapsed = time.time() - start
     logger.debug(f"Proving property: {prop_wctx} returned {res}")
-    return ProofResult[res.upper()]
+    jgs.stats.record_result(res.name)
+    if cache is not None:
+        cache.store(jgs, prop_wctx, res, elapsed)
+    if tuner is not None:
+        tuner.record(prop_wctx, engines, res, elapsed)
+    return res
+
+
+def prove_cmd(
+    prop_wctx: str, time_limit: int = 0, background=False, engines: str = None
+) -> str:
+    """Get the JasperGold command that proves a property (within a time limit
+    in seconds, if not 0, as a background job if background and with the given
+    engines, if any)"""
+    cmd = "prove -bg" if background else "prove"
+    cmd = f"{cmd} -property {{ {prop_wctx} }}"
+    if engines:
+        cmd = f"{cmd} -engine_mode {{ {engines} }}"
+    if time_limit > 0:
+        return f"{cmd} -time_limit {time_limit}s"
+    return cmd
+
+
+def prove_many(
+    jgs: JasperSession,
+    taskcon: str,
+    props: list[str],
+    time_limit: int = None,
+    engines: str = None,
+) -> list[ProofResult]:
+    """Prove several properties in a single Jasper proof job (one per engine
+    mix when the session's tuner picks different engines for them)
+
+    Args:
+        jgs (JasperSession): session to prove in
+        taskcon (str): proof node the properties are defined under
+        props (list[str]): property names
+        time_limit (int, optional): time limit (in seconds) of the proof job, 0 for
+            none. Defaults to None (the session's time limit).
+        engines (str, optional): Jasper engines to prove with (e.g. B for bounded
+            model checking, which only finds counterexamples, "" for the default
+            engines). Defaults to None (picked by the session's tuner, if any).
+
+    Returns:
+        list[ProofResult]: result of the proof of each property (in order)
+    """
+    if time_limit is None:
+        time_limit = jgs.time_limit
+    wctxs = [get_wctx(taskcon, f"P_{prop}") for prop in props]
+    results: dict[str, ProofResult] = {}
+    if jgs.cache is not None:
+        for wctx in wctxs:
+            res = jgs.cache.lookup(jgs, wctx)
+            if res is not None:
+                results[wctx] = res
+    todo = [wctx for wctx in wctxs if wctx not in results]
+    if todo:
+        logger.debug(f"Proving properties: {todo}")
+        tuner = jgs.tuner if engines is None else None
+        mixes: dict[str, list[str]] = {}
+        for wctx in todo:
+            mix = tuner.engines(wctx) if tuner is not None else engines
+            mixes.setdefault(mix, []).append(wctx)
+        start = time.time()
+        # The prove reports a summary, the status of each property is
+        # queried in the same round trip
+        statuses = jgs.eval_batch(
+            [prove_cmd(" ".join(ws), time_limit, engines=m) for m, ws in mixes.items()]
+            + [f"get_status {wctx}" for wctx in todo]
+        )[len(mixes) :]
+        elapsed = time.time() - start
+        logger.debug(f"Proving properties: {todo} returned {statuses}")
+        for wctx, status in zip(todo, statuses):
+            res = status_result(status)
+            results[wctx] = res
+            jgs.stats.record_result(res.name)
+            # Only counterexamples are conclusive for other engines
+            if jgs.cache is not None and (not engines or res == ProofResult.CEX):
+                jgs.cache.store(jgs, wctx, res, elapsed / len(todo))
+            if tuner is not None:
+                tuner.record(wctx, tuner.engines(wctx), res, elapsed / len(todo))
+    return [results[wctx] for wctx in wctxs]
+
+
+# Property statuses (get_status) of proofs that are still running
+PENDING_STATUS = ("unknown", "processing", "running")
+
+# Time (in seconds) between two polls of the status of background proofs
+POLL_INTERVAL = 0.05
+
+# Time (in seconds) past their time limit after which pending proofs are given up on
+STATUS_GRACE = 30.0
+
+
+class ProofHandle:
+    """A proof running as a background job in a Jasper session"""
+
+    def __init__(
+        self,
+        jgs: JasperSession,
+        prop_wctx: str,
+        engines: str = None,
+        time_limit: int = 0,
+        grace: float = STATUS_GRACE,
+    ) -> None:
+        """
+        Args:
+            jgs (JasperSession): session the proof runs in
+            prop_wctx (str): hierarchical property name
+            engines (str, optional): engines picked by the session's tuner (if any). Defaults to None.
+            time_limit (int, optional): time limit (in seconds) of the proof, 0 for none. Defaults to 0.
+            grace (float, optional): time (in seconds) past the time limit after which
+                a proof that is still pending is given up on. Defaults to STATUS_GRACE.
+        """
+        self.jgs = jgs
+        self.prop_wctx = prop_wctx
+        self.engines = engines
+        self.time_limit = time_limit
+        self.grace = grace
+        self.started()
+        # Result of the proof (None while it is running)
+        self.result: ProofResult = None
+
+    def started(self):
+        """Record that the job was (re)started in its session"""
+        self.start = time.time()
+        # The job is lost if the session reconnects
+        self.reconnects = self.jgs.reconnects
+
+    def expired(self) -> bool:
+        """Is the proof still pending well past its time limit (e.g., it never
+        started). Proofs without a time limit do not expire."""
+        if self.time_limit == 0:
+            return False
+        return time.time() > self.start + self.time_limit + self.grace
+
+    def done(self) -> bool:
+        return self.result is not None
+
+    def __str__(self) -> str:
+        return f"ProofHandle({self.prop_wctx}, {self.result})"
+
+
+def prove_async(
+    jgs: JasperSession, taskcon: str, prop: str, time_limit: int = None
+) -> ProofHandle:
+    """Start the proof of a property as a background job
+
+    Args:
+        jgs (JasperSession): session to prove in
+        taskcon (str): proof node the property is defined under
+        prop (str): property name
+        time_limit (int, optional): time limit (in seconds) of the proof, 0 for
+            none. Defaults to None (the session's time limit).
+
+    Returns:
+        ProofHandle: handle of the running proof (done on a proof cache hit)
+    """
+    if time_limit is None:
+        time_limit = jgs.time_limit
+    prop_wctx = get_wctx(taskcon, f"P_{prop}")
+    engines = jgs.tuner.engines(prop_wctx) if jgs.tuner is not None else None
+    handle = ProofHandle(jgs, prop_wctx, engines, time_limit)
+    if jgs.cache is not None:
+        handle.result = jgs.cache.lookup(jgs, handle.prop_wctx)
+        if handle.done():
+            return handle
+    _start_job(handle)
+    return handle
+
+
+def _start_job(handle: ProofHandle):
+    logger.debug(f"Starting background proof of property: {handle.prop_wctx}")
+    handle.jgs.eval(
+        prove_cmd(handle.prop_wctx, handle.time_limit, True, handle.engines)
+    )
+    handle.started()
+
+
+def wait_any(
+    handles: list[ProofHandle], poll: float = POLL_INTERVAL
+) -> list[ProofHandle]:
+    """Wait for at least one of the background proofs to complete. The status
+    of the running proofs is polled with one query per session. Proofs lost
+    by a reconnect of their session are started again, and proofs still
+    pending well past their time limit (see ProofHandle.expired) are UNKNOWN.
+
+    Args:
+        handles (list[ProofHandle]): handles of the proofs
+        poll (float, optional): time (in seconds) between polls. Defaults to POLL_INTERVAL.
+
+    Returns:
+        list[ProofHandle]: handles of the completed proofs (empty if handles is)
+    """
+    while True:
+        done = [h for h in handles if h.done()]
+        running = [h for h in handles if not h.done()]
+        if done or not running:
+            return done
+        sessions: dict[JasperSession, list[ProofHandle]] = {}
+        for h in running:
+            if h.reconnects != h.jgs.reconnects:
+                logger.warning(
+                    f"Background proof of {h.prop_wctx} was lost, restarting it"
+                )
+                _start_job(h)
+            elif h.expired():
+                logger.warning(
+                    f"Background proof of {h.prop_wctx} is still pending past its time limit, giving up"
+                )
+                h.result = ProofResult.UNKNOWN
+                h.jgs.stats.record_result(h.result.name)
+            else:
+                sessions.setdefault(h.jgs, []).append(h)
+        for jgs, hs in sessions.items():
+            statuses = jgs.eval_batch([f"get_status {h.prop_wctx}" for h in hs])
+            for h, status in zip(hs, statuses):
+                if status in PENDING_STATUS:
+                    continue
+                h.result = status_result(status)
+                logger.debug(f"Background proof of {h.prop_wctx} returned {status}")
+                jgs.stats.record_result(h.result.name)
+                elapsed = time.time() - h.start
+                if jgs.cache is not None:
+                    jgs.cache.store(jgs, h.prop_wctx, h.result, elapsed)
+                if jgs.tuner is not None:
+                    jgs.tuner.record(h.prop_wctx, h.engines, h.result, elapsed)
+        if not any(h.done() for h in running):
+            time.sleep(poll)
+
+
+def wait_all(
+    handles: list[ProofHandle], poll: float = POLL_INTERVAL
+) -> list[ProofResult]:
+    """Wait for all background proofs to complete
+
+    Returns:
+        list[ProofResult]: result of each proof (in order)
+    """
+    while not all(h.done() for h in handles):
+        wait_any([h for h in handles if not h.done()], poll)
+    return [h.result for h in handles]
+
+
+def status_result(status: str) -> ProofResult:
+    """Get the proof result for a prove result or property status (get_status).
+    Inconclusive results (e.g., undetermined after a time limit) are UNKNOWN."""
+    status = status.upper()
+    if status in ProofResult.__members__:
+        return ProofResult[status]
+    elif status.endswith("CEX"):
+        return ProofResult.CEX
+    return ProofResult.UNKNOWN
 
 
 def is_pass(res: ProofResult) -> bool:
@@ -57,123 +350,328 @@ def get_wctx(taskcon: str, prop: str) -> str:
     return f"{taskcon}.{prop}"
 
 
-def disable_assm(taskcon: str, assm: str):
+def disable_assm_cmd(taskcon: str, assm: str) -> str:
+    """Get the JasperGold command that disables an assumption"""
+    return f"assume -disable {get_wctx(taskcon, f'A_{assm}')}"
+
+
+def enable_assm_cmd(taskcon: str, assm: str) -> str:
+    """Get the JasperGold command that enables an assumption"""
+    return f"assume -enable {get_wctx(taskcon, f'A_{assm}')}"
+
+
+def disable_assm(jgs: JasperSession, taskcon: str, assm: str, pool=None):
     """Disable an assumption
 
     Args:
+        jgs (JasperSession): session to disable the assumption in
         taskcon (str): proof node name
         assm (str): assumption name
+        pool (JasperPool, optional): pool of sessions to mirror the command to. Defaults to None.
 
     Returns:
-        _type_: result of the JasperGold command
+        _type_: result of the JasperGold command ("" if it was already disabled)
     """
+    if pool is not None:
+        pool.broadcast(disable_assm, taskcon, assm)
     assm_wctx = get_wctx(taskcon, f"A_{assm}")
+    if jgs.assms.get(assm_wctx) is False:
+        logger.debug(f"Assumption: {assm_wctx} already disabled, skipping")
+        return ""
     logger.debug(f"Disabling assumption: {assm_wctx}")
-    cmd = f"assume -disable {assm_wctx}"
-    res = jgc.eval(cmd)
+    res = jgs.eval(disable_assm_cmd(taskcon, assm))
+    jgs.assms[assm_wctx] = False
     logger.debug(f"Disabling assumption: {assm_wctx} returned {res}")
     return res
 
 
-def enable_assm(taskcon: str, assm: str):
+def enable_assm(jgs: JasperSession, taskcon: str, assm: str, pool=None):
     """Enable an assumption
 
     Args:
+        jgs (JasperSession): session to enable the assumption in
         taskcon (str): proof node name
         assm (str): assumption name
+        pool (JasperPool, optional): pool of sessions to mirror the command to. Defaults to None.
 
     Returns:
-        _type_: result of the JasperGold command
+        _type_: result of the JasperGold command ("" if it was already enabled)
     """
+    if pool is not None:
+        pool.broadcast(enable_assm, taskcon, assm)
     assm_wctx = get_wctx(taskcon, f"A_{assm}")
+    if jgs.assms.get(assm_wctx) is True:
+        logger.debug(f"Assumption: {assm_wctx} already enabled, skipping")
+        return ""
     logger.debug(f"Enabling assumption: {assm_wctx}")
-    cmd = f"assume -enable {assm_wctx}"
-    res = jgc.eval(cmd)
+    res = jgs.eval(enable_assm_cmd(taskcon, assm))
+    jgs.assms[assm_wctx] = True
     logger.debug(f"Enabling assumption: {assm_wctx} returned {res}")
     return res
 
 
-def set_assm_induction_1t(taskcon: str, svacon: SVAContext):
+def _assm_diff(
+    jgs: JasperSession, taskcon: str, assms: list[str], enabled: bool
+) -> list[str]:
+    """Get the assumptions that are not known to be in the given state"""
+    return [
+        assm
+        for assm in assms
+        if jgs.assms.get(get_wctx(taskcon, f"A_{assm}")) is not enabled
+    ]
+
+
+def set_assms(
+    jgs: JasperSession, taskcon: str, enable: list[str], disable: list[str], pool=None
+):
+    """Enable and disable a set of assumptions in a single batch. Only the
+    assumptions whose state differs from the session's view are sent.
+
+    Args:
+        jgs (JasperSession): session to set the assumptions in
+        taskcon (str): proof node name
+        enable (list[str]): assumptions to enable
+        disable (list[str]): assumptions to disable
+        pool (JasperPool, optional): pool of sessions to mirror the batch to. Defaults to None.
+
+    Returns:
+        list[str]: results of the JasperGold commands
+    """
+    if pool is not None:
+        pool.broadcast(set_assms, taskcon, enable, disable)
+    enable = _assm_diff(jgs, taskcon, enable, True)
+    disable = _assm_diff(jgs, taskcon, disable, False)
+    cmds = [disable_assm_cmd(taskcon, assm) for assm in disable]
+    cmds += [enable_assm_cmd(taskcon, assm) for assm in enable]
+    logger.debug(f"Enabling assumptions: {enable}, disabling assumptions: {disable}")
+    res = jgs.eval_batch(cmds)
+    jgs.assms.update({get_wctx(taskcon, f"A_{assm}"): False for assm in disable})
+    jgs.assms.update({get_wctx(taskcon, f"A_{assm}"): True for assm in enable})
+    return res
+
+
+def set_assm_induction_1t(
+    jgs: JasperSession, taskcon: str, svacon: SVAContext, pool=None
+):
     """Enable only 1-trace assumptions (required for 1 trace properties)
 
     Args:
+        jgs (JasperSession): session to set the assumptions in
         taskcon (str): proof node name
+        pool (JasperPool, optional): pool of sessions to mirror the assumptions to. Defaults to None.
     """
-    for cand in svacon.holes:
-        disable_assm(taskcon, cand)
-    for assm in svacon.assms_2trace:
-        disable_assm(taskcon, assm)
-    for assm in svacon.assms_1trace:
-        enable_assm(taskcon, assm)
-    for assm in svacon.assms_bmc:
-        disable_assm(taskcon, assm)
+    set_assms(
+        jgs,
+        taskcon,
+        enable=svacon.assms_1trace,
+        disable=svacon.holes + svacon.assms_2trace + svacon.assms_bmc,
+        pool=pool,
+    )
 
-def set_assm_induction_2t(taskcon: str, svacon: SVAContext):
+
+def set_assm_induction_2t(
+    jgs: JasperSession, taskcon: str, svacon: SVAContext, pool=None
+):
     """Enable all assumptions required for 2 trace properties
 
     Args:
+        jgs (JasperSession): session to set the assumptions in
         taskcon (str): proof node name
+        pool (JasperPool, optional): pool of sessions to mirror the assumptions to. Defaults to None.
     """
     # Disable all holes in the specification
-    for cand in svacon.holes:
-        disable_assm(taskcon, cand)
-    for assm in svacon.assms_2trace:
-        enable_assm(taskcon, assm)
-    for assm in svacon.assms_1trace:
-        disable_assm(taskcon, assm)
-    for assm in svacon.assms_bmc:
-        disable_assm(taskcon, assm)
-
-def set_assm_bmc(taskcon: str, svacon: SVAContext):
+    set_assms(
+        jgs,
+        taskcon,
+        enable=svacon.assms_2trace,
+        disable=svacon.holes + svacon.assms_1trace + svacon.assms_bmc,
+        pool=pool,
+    )
+
+
+def set_assm_bmc(jgs: JasperSession, taskcon: str, svacon: SVAContext, pool=None):
     """Enable all assumptions required for 1 BMC trace properties"""
     # Disable all holes
-    for cand in svacon.holes:
-        disable_assm(taskcon, cand)
-    for assm in svacon.assms_2trace:
-        disable_assm(taskcon, assm)
-    for assm in svacon.assms_1trace:
-        disable_assm(taskcon, assm)
-    for assm in svacon.assms_bmc:
-        enable_assm(taskcon, assm)
-        
-
-def prove_out_induction_1t(taskcon) -> ProofResult:
-    return prove(taskcon, "output_inv")
-
-
-def prove_out_induction_2t(taskcon) -> ProofResult:
-    return prove(taskcon, "output")
-
-def prove_out_bmc(taskcon, k: int) -> list[ProofResult]:
-    results = []
-    for i in range(k):
-        results.append(prove(taskcon, f"step_{i}"))
-    return results
-
-def loadscript(script):
-    # Get pwd
-    cmd = f"include {script}"
-    logger.info(f"Loading Jasper script: {cmd}")
-    res = jgc.eval(cmd)
+    set_assms(
+        jgs,
+        taskcon,
+        enable=svacon.assms_bmc,
+        disable=svacon.holes + svacon.assms_2trace + svacon.assms_1trace,
+        pool=pool,
+    )
+
+
+def prove_out_induction_1t(jgs: JasperSession, taskcon) -> ProofResult:
+    return prove(jgs, taskcon, "output_inv")
+
+
+def prove_out_induction_2t(jgs: JasperSession, taskcon) -> ProofResult:
+    return prove(jgs, taskcon, "output")
+
+
+def prove_out_bmc(
+    jgs: JasperSession, taskcon, k: int, pool=None, background=False
+) -> list[ProofResult]:
+    steps = [f"step_{i}" for i in range(k)]
+    if pool is not None:
+        # Spread the step proofs across the sessions in the pool
+        return pool.prove_many(taskcon, steps)
+    if background:
+        # One background proof job per step
+        return wait_all([prove_async(jgs, taskcon, step) for step in steps])
+    return prove_many(jgs, taskcon, steps)
+
+
+def prove_obligations(
+    jgs: JasperSession, taskcon, props: list[str], keys: dict[str, str], pool=None
+) -> list[ProofResult]:
+    """Prove granular obligations independently. Their cached results are keyed
+    by their own specification, so they survive edits of other obligations.
+
+    Args:
+        jgs (JasperSession): session to prove in
+        taskcon (str): proof node name
+        props (list[str]): obligation property names
+        keys (dict[str, str]): key of each obligation (see SVAGen.obligations)
+        pool (JasperPool, optional): pool of sessions to spread the proofs across. Defaults to None.
+
+    Returns:
+        list[ProofResult]: result of the proof of each obligation (in order)
+    """
+    if jgs.cache is not None:
+        jgs.cache.keys.update(
+            {get_wctx(taskcon, f"P_{prop}"): keys[prop] for prop in props}
+        )
+    if pool is not None:
+        return pool.prove_many(taskcon, props)
+    return prove_many(jgs, taskcon, props)
+
+
+def loadscript(jgs: JasperSession, script, pool=None, pycfile="", reload=""):
+    """Load a Jasper script, skipping or shortening the load when the design
+    loaded in the session is unchanged. When the script is loaded in full and
+    the pool has a snapshot path, the elaborated design is saved to the
+    snapshot and the pool sessions restore it instead of elaborating again.
+
+    Args:
+        jgs (JasperSession): session to load the script in
+        script (str): Jasper script (relative to the Jasper working directory)
+        pool (JasperPool, optional): pool of sessions to mirror the load to. Defaults to None.
+        pycfile (str, optional): generated SVA file, the only input that changes
+            between loads in a run. Defaults to "" (always load the full script).
+        reload (str, optional): Jasper script that re-analyzes and re-elaborates
+            the design when only pycfile changed. Defaults to "" (load the full script).
+
+    Returns:
+        str: result of the JasperGold command ("" if the load was skipped)
+    """
+    res, full = _load(jgs, script, pycfile, reload)
+    if pool is not None:
+        if full and pool.snapshot != "" and save_snapshot(jgs, pool.snapshot):
+            pool.broadcast(restore_snapshot, pool.snapshot, script, jgs.loaded)
+        else:
+            pool.broadcast(loadscript, script, None, pycfile, reload)
     return res
 
 
-def create_vcd_trace(prop, filepath):
+def _load(jgs: JasperSession, script, pycfile, reload) -> tuple[str, bool]:
+    # Returns the result of the load and whether the full script was loaded
+    loaded = None
+    if jgs.jwd is not None and pycfile != "":
+        # The SVA is the top file and its module shards
+        specs = spec_files(pycfile)
+        loaded = (script, design_hash(jgs.jwd, script, specs), files_hash(specs))
+
+    if loaded is not None and loaded == jgs.loaded:
+        logger.info(f"Jasper script {script} already loaded, not reloading.")
+        # Restore the assumptions to their state after a fresh load
+        disabled = [wctx for wctx, en in jgs.assms.items() if not en]
+        jgs.eval_batch([f"assume -enable {wctx}" for wctx in disabled])
+        jgs.assms.update({wctx: True for wctx in disabled})
+        return "", False
+
+    same_design = (
+        loaded is not None and jgs.loaded is not None and loaded[:2] == jgs.loaded[:2]
+    )
+    if reload != "" and same_design:
+        cmd = f"include {reload}"
+    else:
+        cmd = f"include {script}"
+    logger.info(f"Loading Jasper script: {cmd}")
+    # Forget the loaded design in case the load fails half way
+    jgs.script, jgs.loaded = None, None
+    res = jgs.eval(cmd)
+    jgs.script, jgs.loaded = script, loaded
+    # A fresh load resets all assumptions
+    jgs.assms.clear()
+    if jgs.cache is not None:
+        jgs.cache.refresh()
+    return res, cmd == f"include {script}"
+
+
+def save_snapshot(jgs: JasperSession, snapshot: str) -> bool:
+    """Save the elaborated design and proof setup of a session to a snapshot
+    (Jasper database)
+
+    Args:
+        jgs (JasperSession): session to save
+        snapshot (str): path of the snapshot
+
+    Returns:
+        bool: whether the snapshot was saved
+    """
+    logger.info(f"Saving Jasper snapshot: {snapshot}")
+    try:
+        jgs.eval(f"save -jdb {snapshot} -capture_setup -force")
+        return True
+    except JasperError:
+        logger.warning(f"Could not save Jasper snapshot {snapshot}, loading in full.")
+        return False
+
+
+def restore_snapshot(jgs: JasperSession, snapshot: str, script, loaded):
+    """Restore a session from a snapshot taken after loading a script, loading
+    the script in full if the snapshot cannot be restored
+
+    Args:
+        jgs (JasperSession): session to restore
+        snapshot (str): path of the snapshot
+        script (str): Jasper script the snapshot was taken after
+        loaded (tuple[str, str, str]): (script, design hash, SVA hash) of the
+            snapshot (None if unknown)
+    """
+    logger.info(f"Restoring Jasper snapshot {snapshot} in {jgs}")
+    jgs.script, jgs.loaded = None, None
+    try:
+        jgs.eval(f"restore -jdb {snapshot}")
+    except JasperError:
+        logger.warning(f"Could not restore Jasper snapshot {snapshot} in {jgs}.")
+        jgs.eval(f"include {script}")
+    jgs.script, jgs.loaded = script, loaded
+    jgs.assms.clear()
+    if jgs.cache is not None:
+        jgs.cache.refresh()
+
+
+def create_vcd_trace(jgs: JasperSession, prop, filepath):
     windowcmd = f"visualize -violation -property {prop} -window visualize:trace"
     tracecmd = f"visualize -save -force -vcd {filepath} -window visualize:trace"
     logger.debug(f"Creating VCD trace for property: {prop}")
-    windowres = jgc.eval(windowcmd)
-    traceres = jgc.eval(tracecmd)
+    windowres = jgs.eval(windowcmd)
+    traceres = jgs.eval(tracecmd)
     logger.debug(
         f"Creating VCD trace for property: {prop} returned {windowres}; {traceres}"
     )
     return
 
 
-def setjwd(jwd):
+def setjwd(jgs: JasperSession, jwd, pool=None):
+    if pool is not None:
+        pool.broadcast(setjwd, jwd)
     # Change the Jasper working directory
     pwd = os.getcwd()
     cmd = f"cd {pwd}/{jwd}"
-    res = jgc.eval(cmd)
+    res = jgs.eval(cmd)
+    jgs.jwd = jwd
     logger.debug(f"Changing Jasper working directory to {jwd} returned {res}")
     return res
@@ -0,0 +1,125 @@
+"""
+    Persistent (sqlite) cache of Jasper proof results
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+
+from .jasperclient import JasperSession
+from .jgoracle import ProofResult, is_pass
+from .designhash import files_hash, design_hash
+from ..svagen import spec_files
+
+logger = logging.getLogger(__name__)
+
+
+# Default location of the cache (relative to the pycaliper directory)
+CACHE_FILE = "pycaliper.cache.db"
+
+
+class ProofCache:
+    """Proof results keyed by the design, the generated SVA file (or a key of
+    the property's own specification), the set of enabled assumptions and the
+    property name."""
+
+    def __init__(self, jdir: str, script: str, pycfile: str, path: str = CACHE_FILE):
+        """
+        Args:
+            jdir (str): Jasper directory
+            script (str): Jasper script (relative to jdir)
+            pycfile (str): generated SVA file
+            path (str, optional): location of the sqlite database. Defaults to CACHE_FILE.
+        """
+        self.jdir = jdir
+        self.script = script
+        self.pycfile = pycfile
+        self.path = path
+        self.design = ""
+        self.spec = ""
+        # Keys of properties that are cached by their own specification rather
+        # than by the whole SVA (e.g., granular obligations)
+        self.keys: dict[str, str] = {}
+
+        self.hits = 0
+        self.misses = 0
+        # Proof time (in seconds) saved by cache hits
+        self.time_saved = 0.0
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS proofs ("
+            + "design TEXT, spec TEXT, assms TEXT, prop TEXT, result TEXT, time REAL, "
+            + "PRIMARY KEY (design, spec, assms, prop))"
+        )
+        self.conn.commit()
+
+    def refresh(self):
+        """Rehash the design and SVA files (they may change between script loads)"""
+        specs = spec_files(self.pycfile)
+        self.design = design_hash(self.jdir, self.script, specs)
+        self.spec = files_hash(specs)
+
+    def _assms_key(self, jgs: JasperSession) -> str:
+        enabled = sorted([assm for assm, en in jgs.assms.items() if en])
+        return hashlib.sha256("\n".join(enabled).encode("utf-8")).hexdigest()
+
+    def lookup(self, jgs: JasperSession, prop_wctx: str) -> ProofResult:
+        """Look up the result of a proof under the current assumptions of a session
+
+        Args:
+            jgs (JasperSession): session the proof would run in
+            prop_wctx (str): hierarchical property name
+
+        Returns:
+            ProofResult: cached result (None on a miss)
+        """
+        spec = self.keys.get(prop_wctx, self.spec)
+        key = (self.design, spec, self._assms_key(jgs), prop_wctx)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT result, time FROM proofs "
+                + "WHERE design = ? AND spec = ? AND assms = ? AND prop = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.time_saved += row[1]
+        logger.debug(f"Proof cache hit for property: {prop_wctx} ({row[0]})")
+        return ProofResult[row[0]]
+
+    def store(self, jgs: JasperSession, prop_wctx: str, res: ProofResult, time: float):
+        """Store the (conclusive) result of a proof
+
+        Args:
+            jgs (JasperSession): session the proof ran in
+            prop_wctx (str): hierarchical property name
+            res (ProofResult): result of the proof
+            time (float): time taken by the proof (in seconds)
+        """
+        if not (is_pass(res) or res == ProofResult.CEX):
+            return
+        spec = self.keys.get(prop_wctx, self.spec)
+        key = (self.design, spec, self._assms_key(jgs), prop_wctx)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO proofs VALUES (?, ?, ?, ?, ?, ?)",
+                key + (res.name, time),
+            )
+            self.conn.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+            "time_saved": self.time_saved,
+        }
+
+    def close(self):
+        self.conn.close()
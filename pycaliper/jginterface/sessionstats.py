@@ -0,0 +1,119 @@
+"""
+    Latency and traffic statistics of Jasper sessions
+"""
+
+import bisect
+import threading
+
+# Upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = [0.001, 0.01, 0.1, 1.0, 10.0, 100.0]
+
+
+def command_kind(command: str) -> str:
+    """Classify a command for the statistics: its first word, with assume
+    split into enable and disable (e.g. prove, include, assume -enable)"""
+    words = command.split()
+    if not words:
+        return ""
+    if words[0] == "assume" and len(words) > 1 and words[1] in ("-enable", "-disable"):
+        return f"assume {words[1]}"
+    return words[0]
+
+
+class LatencyHistogram:
+    """Histogram of round trip latencies"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        # One bucket per bound in LATENCY_BUCKETS and one for longer latencies
+        self.buckets = [0 for _ in range(len(LATENCY_BUCKETS) + 1)]
+
+    def add(self, latency: float):
+        self.count += 1
+        self.total += latency
+        self.min = latency if self.min is None else min(self.min, latency)
+        self.max = latency if self.max is None else max(self.max, latency)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def merge(self, other: "LatencyHistogram"):
+        self.count += other.count
+        self.total += other.total
+        for v in (other.min, other.max):
+            if v is not None:
+                self.min = v if self.min is None else min(self.min, v)
+                self.max = v if self.max is None else max(self.max, v)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def to_dict(self) -> dict:
+        labels = [f"<={b}" for b in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}"]
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count > 0 else 0.0,
+            "min": self.min,
+            "max": self.max,
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class SessionStats:
+    """Round trip latencies by command kind, bytes on the wire and proof
+    results of a Jasper session"""
+
+    def __init__(self) -> None:
+        # Latency of round trips by command kind (batches are of kind "batch")
+        self.latency: dict[str, LatencyHistogram] = {}
+        # Number of commands sent by kind (including commands in batches)
+        self.commands: dict[str, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        # Number of proofs by result
+        self.results: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, commands: list[str], latency: float, sent: int, received: int):
+        """Record a round trip
+
+        Args:
+            commands (list[str]): commands evaluated (more than one for a batch)
+            latency (float): round trip time (in seconds)
+            sent (int): bytes sent
+            received (int): bytes received
+        """
+        kind = command_kind(commands[0]) if len(commands) == 1 else "batch"
+        with self._lock:
+            self.latency.setdefault(kind, LatencyHistogram()).add(latency)
+            for command in commands:
+                ckind = command_kind(command)
+                self.commands[ckind] = self.commands.get(ckind, 0) + 1
+            self.bytes_sent += sent
+            self.bytes_received += received
+
+    def record_result(self, result: str):
+        """Record the result of a proof"""
+        with self._lock:
+            self.results[result] = self.results.get(result, 0) + 1
+
+    def merge(self, other: "SessionStats"):
+        with self._lock:
+            for kind, hist in other.latency.items():
+                self.latency.setdefault(kind, LatencyHistogram()).merge(hist)
+            for kind, n in other.commands.items():
+                self.commands[kind] = self.commands.get(kind, 0) + n
+            for result, n in other.results.items():
+                self.results[result] = self.results.get(result, 0) + n
+            self.bytes_sent += other.bytes_sent
+            self.bytes_received += other.bytes_received
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "latency": {k: h.to_dict() for k, h in self.latency.items()},
+                "commands": dict(self.commands),
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+                "results": dict(self.results),
+            }
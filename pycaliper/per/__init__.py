@@ -1,11 +1,14 @@
 from .per import (
     Logic,
     LogicArray,
+    LogicArraySlice,
     Struct,
     Group,
     Module,
     Eq,
     CondEq,
+    ArrayEq,
+    per_elems,
     Path,
     Context,
     PER,
@@ -0,0 +1,155 @@
+"""
+    PyCaliper
+
+    File: per/cse.py
+
+    Common subexpression elimination over Expr DAGs for SVA generation
+"""
+
+from typing import Iterator
+
+from .expr import (
+    Expr,
+    Op,
+    OpApply,
+    LogicalAnd,
+    LogicalOr,
+    LogicalImplication,
+    LogicalEquivalence,
+    UnaryLogicalNot,
+    LessThan,
+    LessThanEqual,
+    GreaterThan,
+    GreaterThanEqual,
+    Equality,
+    Inequality,
+    CaseEquality,
+    CaseInequality,
+    WildcardEquality,
+    WildcardInequality,
+)
+
+# Operators with a single bit result (their applications can be hoisted into wires)
+BOOLEAN_OPS = (
+    LogicalAnd,
+    LogicalOr,
+    LogicalImplication,
+    LogicalEquivalence,
+    UnaryLogicalNot,
+    LessThan,
+    LessThanEqual,
+    GreaterThan,
+    GreaterThanEqual,
+    Equality,
+    Inequality,
+    CaseEquality,
+    CaseInequality,
+    WildcardEquality,
+    WildcardInequality,
+)
+
+
+class ExprCSE:
+    """Finds the boolean sub-expressions that are used more than once by a set
+    of expressions (each under a trace prefix) and renders the expressions with
+    those sub-expressions replaced by named wires.
+
+    Sub-expressions are identified structurally (hash consing), so equal
+    sub-expressions built as different objects are shared too.
+    """
+
+    def __init__(self, prefix: str) -> None:
+        """
+        Args:
+            prefix (str): prefix of the names of the wires
+        """
+        self.prefix = prefix
+        # Structural key -> node number (numbered children first)
+        self._nodes: dict[tuple, int] = {}
+        # Expression object (and prefix) -> node number
+        self._memo: dict[tuple[int, str], int] = {}
+        # Node number -> an expression and prefix it stands for
+        self._exprs: dict[int, tuple[Expr, str]] = {}
+        # Node number -> number of uses (by distinct parent nodes and roots)
+        self._uses: dict[int, int] = {}
+        # Node number -> wire name of the hoisted nodes
+        self.names: dict[int, str] = {}
+
+    def _visit(self, expr: Expr, pref: str) -> int:
+        memo = (id(expr), pref)
+        if memo in self._memo:
+            node = self._memo[memo]
+            self._uses[node] += 1
+            return node
+        children = []
+        if isinstance(expr, OpApply):
+            args = tuple(
+                ("node", self._visit(a, pref)) if isinstance(a, Expr) else ("lit", a)
+                for a in expr.args
+            )
+            children = [c for (kind, c) in args if kind == "node"]
+            key = (expr.op.opstring, expr.op.fixity, args)
+        else:
+            key = ("leaf", expr.get_sva(pref))
+        if key in self._nodes:
+            # Structural repeat: its children are used by the first occurrence
+            node = self._nodes[key]
+            for child in children:
+                self._uses[child] -= 1
+            self._uses[node] += 1
+        else:
+            node = len(self._nodes)
+            self._nodes[key] = node
+            self._exprs[node] = (expr, pref)
+            self._uses[node] = 1
+        self._memo[memo] = node
+        return node
+
+    def add(self, expr: Expr, pref: str = "a"):
+        """Count the uses of the sub-expressions of an expression
+
+        Args:
+            expr (Expr): expression that will be rendered
+            pref (str, optional): trace prefix it will be rendered under. Defaults to 'a'.
+        """
+        self._visit(expr, pref)
+
+    def wires(self) -> Iterator[str]:
+        """Name the boolean sub-expressions used more than once and stream their
+        wire declarations (in dependency order)"""
+        self.names = {}
+        for node, (expr, _) in self._exprs.items():
+            if (
+                self._uses[node] > 1
+                and isinstance(expr, OpApply)
+                and isinstance(expr.op, BOOLEAN_OPS)
+            ):
+                self.names[node] = f"{self.prefix}_{len(self.names)}"
+        for node, name in self.names.items():
+            expr, pref = self._exprs[node]
+            yield f"wire {name} = {self._render_node(expr, pref)};\n"
+
+    def render(self, expr: Expr, pref: str = "a") -> str:
+        """SVA of an expression, using the wires of the hoisted sub-expressions"""
+        node = self._memo.get((id(expr), pref))
+        if node in self.names:
+            return self.names[node]
+        return self._render_node(expr, pref)
+
+    def _render_node(self, expr: Expr, pref: str) -> str:
+        # As OpApply.get_sva, rendering the arguments through the wires
+        if not isinstance(expr, OpApply):
+            return expr.get_sva(pref)
+        args = expr.args
+        if expr.op.fixity == Op.Fixity.EXTRACT:
+            return f"{self.render(args[0], pref)}[{args[1]}:{args[2]}]"
+        elif expr.op.fixity == Op.Fixity.CONCAT:
+            argseq = ", ".join([self.render(arg, pref) for arg in args])
+            return f"{{ {argseq} }}"
+        elif expr.op.fixity == Op.Fixity.INFIX:
+            return (
+                f"({self.render(args[0], pref)} {expr.op} {self.render(args[1], pref)})"
+            )
+        elif expr.op.fixity == Op.Fixity.PREFIX:
+            return f"{expr.op} {self.render(args[0], pref)}"
+        return expr.get_sva(pref)
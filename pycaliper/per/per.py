@@ -296,14 +296,25 @@ class LogicArray(TypedElem):
     def get_hier_path(self, sep: str = "."):
         return self.path.get_hier_path(sep)
 
-    def __getitem__(self, key: int):
+    def __getitem__(self, key: int | slice):
         """
         Args:
-            key (int): index of the signal, offset by the base index
+            key (int | slice): index of the signal, offset by the base index, or a
+                (strided) slice of indices, e.g. arr[0:8:2]
 
         Returns:
-            TypedElem: signal at the given index
+            TypedElem: signal at the given index, LogicArraySlice for a slice
         """
+        if isinstance(key, slice):
+            start = self.base if key.start is None else key.start
+            stop = self.base + self.size if key.stop is None else key.stop
+            indices = range(start, stop, 1 if key.step is None else key.step)
+            if len(indices) == 0 or not (
+                self.base <= min(indices) and max(indices) < self.base + self.size
+            ):
+                logger.error(f"Invalid slice {key} of array {self.name}")
+                sys.exit(1)
+            return LogicArraySlice(self, indices)
         return self.logic[key - self.base]
 
     def __str__(self):
@@ -323,6 +334,36 @@ class LogicArray(TypedElem):
         return self.logic[index - self.base]
 
 
+class LogicArraySlice:
+    """A strided range of the elements of a LogicArray"""
+
+    def __init__(self, arr: LogicArray, indices: range):
+        """
+        Args:
+            arr (LogicArray): the array
+            indices (range): indices of the elements (offset by the base index)
+        """
+        self.arr = arr
+        self.indices = indices
+
+    @property
+    def logic(self) -> list[TypedElem]:
+        return [self.arr[i] for i in self.indices]
+
+    def __str__(self):
+        return (
+            f"{self.arr}[{self.indices.start}:{self.indices.stop}:{self.indices.step}]"
+        )
+
+    def __repr__(self):
+        return f"{repr(self.arr)}[{self.indices.start}:{self.indices.stop}:{self.indices.step}]"
+
+
+def _render(expr: Expr, pref: str, render: Callable[[Expr, str], str] = None) -> str:
+    # SVA of an expression, through a renderer if any (e.g., ExprCSE.render)
+    return expr.get_sva(pref) if render is None else render(expr, pref)
+
+
 # Partial equivalence relation
 class PER:
     """Partial Equivalence Relation (PER) base class"""
@@ -333,7 +374,7 @@ class PER:
     def __str__(self) -> str:
         raise NotImplementedError("Method not implemented for abstract base PER class.")
 
-    def get_sva(self, cpy1: str, cpy2: str):
+    def get_sva(self, cpy1: str, cpy2: str, render: Callable = None):
         raise NotImplementedError("Method not implemented for abstract base PER class.")
 
 
@@ -355,11 +396,12 @@ class Eq(PER):
     def __str__(self) -> str:
         return f"eq({self.logic})"
 
-    def get_sva(self, cpy1: str = "a", cpy2: str = "b") -> str:
+    def get_sva(self, cpy1: str = "a", cpy2: str = "b", render: Callable = None) -> str:
         """
         Args:
             cpy1 (str, optional): Hierarchy prefix of left copy. Defaults to 'a'.
             cpy2 (str, optional): Hierarchy prefix of right copy. Defaults to 'b'.
+            render (Callable, optional): renderer of expressions. Defaults to None (get_sva).
 
         Returns:
             str: SVA representation of the equality assertion.
@@ -381,10 +423,11 @@ class CondEq(PER):
     def __str__(self) -> str:
         return f"condeq({self.cond}, {self.per})"
 
-    def get_sva(self, cpy1: str = "a", cpy2: str = "b") -> str:
-        """Get the SVA representation of the conditional equality assertion."""
+    def get_sva(self, cpy1: str = "a", cpy2: str = "b", render: Callable = None) -> str:
+        """Get the SVA representation of the conditional equality assertion
+        (render, if given, renders the condition, e.g. ExprCSE.render)."""
         return (
-            f"!({self.cond.get_sva(cpy1)} && {self.cond.get_sva(cpy2)}) | "
+            f"!({_render(self.cond, cpy1, render)} && {_render(self.cond, cpy2, render)}) | "
             + f"({self.logic.get_sva(cpy1)} == {self.logic.get_sva(cpy2)})"
         )
 
@@ -392,14 +435,99 @@ class CondEq(PER):
         return f"self.when({repr(self.cond)})({repr(self.logic)})"
 
 
+class ArrayEq(PER):
+    """(Conditional) relational equality of all elements of an array, or of a
+    strided range of them. The elements are kept symbolic, so that the SVA
+    scales with the number of arrays rather than the number of elements."""
+
+    def __init__(
+        self, arr: LogicArray, indices: range = None, cond: Expr = None
+    ) -> None:
+        """
+        Args:
+            arr (LogicArray): the array
+            indices (range, optional): indices of the elements (offset by the base index).
+                Defaults to None (all elements).
+            cond (Expr, optional): condition of the equality. Defaults to None (unconditional).
+        """
+        super().__init__()
+        if not all(isinstance(l, Logic) for l in arr.logic):
+            logger.error(f"Invalid PER type: {arr}, currently only Logic supported.")
+            sys.exit(1)
+        self.arr = arr
+        self.indices = (
+            range(arr.base, arr.base + arr.size) if indices is None else indices
+        )
+        self.cond = cond
+
+    def is_whole(self) -> bool:
+        return self.indices == range(self.arr.base, self.arr.base + self.arr.size)
+
+    def elems(self) -> list[PER]:
+        """Element-wise PERs (one Eq or CondEq per element)"""
+        if self.cond is None:
+            return [Eq(self.arr[i]) for i in self.indices]
+        return [CondEq(self.cond, self.arr[i]) for i in self.indices]
+
+    def __str__(self) -> str:
+        arr = self.arr if self.is_whole() else LogicArraySlice(self.arr, self.indices)
+        if self.cond is None:
+            return f"eq({arr})"
+        return f"condeq({self.cond}, {arr})"
+
+    def get_sva(
+        self,
+        cpy1: str = "a",
+        cpy2: str = "b",
+        index: str = "i",
+        render: Callable = None,
+    ) -> str:
+        """
+        Args:
+            cpy1 (str, optional): Hierarchy prefix of left copy. Defaults to 'a'.
+            cpy2 (str, optional): Hierarchy prefix of right copy. Defaults to 'b'.
+            index (str, optional): SV expression of the element index. Defaults to 'i'.
+            render (Callable, optional): renderer of the condition. Defaults to None (get_sva).
+
+        Returns:
+            str: SVA representation of the equality of the element at index.
+        """
+        eq = (
+            f"{cpy1}.{self.arr.get_hier_path()}[{index}] == "
+            + f"{cpy2}.{self.arr.get_hier_path()}[{index}]"
+        )
+        if self.cond is None:
+            return eq
+        cond1 = _render(self.cond, cpy1, render)
+        cond2 = _render(self.cond, cpy2, render)
+        return f"!({cond1} && {cond2}) | ({eq})"
+
+    def __repr__(self):
+        arr = self.arr if self.is_whole() else LogicArraySlice(self.arr, self.indices)
+        if self.cond is None:
+            return f"self.eq({repr(arr)})"
+        return f"self.when({repr(self.cond)})({repr(arr)})"
+
+
+def per_elems(pers: list[PER]) -> list[PER]:
+    """Element-wise PERs: array PERs are expanded into one PER per element"""
+    elems = []
+    for per in pers:
+        if isinstance(per, ArrayEq):
+            elems.extend(per.elems())
+        else:
+            elems.append(per)
+    return elems
+
+
 class Inv:
     """Invariant class"""
 
     def __init__(self, expr: Expr):
         self.expr = expr
 
-    def get_sva(self, pref: str = "a"):
-        return self.expr.get_sva(pref)
+    def get_sva(self, pref: str = "a", render: Callable = None):
+        return _render(self.expr, pref, render)
 
     def __repr__(self):
         return f"self.inv({repr(self.expr)})"
@@ -758,7 +886,9 @@ class Module:
             if isinstance(elem, Logic):
                 eqs.append(Eq(elem))
             elif isinstance(elem, LogicArray):
-                eqs.extend([Eq(l) for l in elem.logic])
+                eqs.append(ArrayEq(elem))
+            elif isinstance(elem, LogicArraySlice):
+                eqs.append(ArrayEq(elem.arr, elem.indices))
             elif isinstance(elem, Struct):
                 logger.error("Structs are not yet supported in Eq invariants.")
         if self._context == Context.INPUT:
@@ -801,7 +931,12 @@ class Module:
                 elif isinstance(per, CondEq):
                     ceqs = [CondEq(cond & per.cond, per.logic)]
                 elif isinstance(per, LogicArray):
-                    ceqs = [CondEq(cond, p) for p in per.logic]
+                    ceqs = [ArrayEq(per, cond=cond)]
+                elif isinstance(per, LogicArraySlice):
+                    ceqs = [ArrayEq(per.arr, per.indices, cond)]
+                elif isinstance(per, ArrayEq):
+                    conds = cond if per.cond is None else cond & per.cond
+                    ceqs = [ArrayEq(per.arr, per.indices, conds)]
                 else:
                     logger.error(f"Invalid PER type: {per}")
                     sys.exit(1)
@@ -16,6 +16,13 @@ def TOP_STEP_PROP(k: int) -> str:
     """Get the property name for a given step"""
     return f"{STEP_PROP}_{k}"
 
+# Granular obligations: one property per state/output PER or invariant of the
+# top module, named after its wire (e.g. state__eq_reg1_q) or, for invariants,
+# after the hash of its expression (e.g. output_inv__3fa2b1c0)
+def OBLIGATION_PROP(ctx: str, name: str) -> str:
+    """Get the property name of an obligation of a context"""
+    return f"{ctx}__{name}"
+
 def get_as_assm(prop: str) -> str:
     """Get the assumption name for a given property"""
     return f"A_{prop}"
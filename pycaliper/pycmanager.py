@@ -6,13 +6,23 @@ from enum import Enum
 
 import tempfile
 import importlib
+from functools import partial
 
 import json
 from jsonschema import validate
 from jsonschema.exceptions import ValidationError
 
-from pycaliper.jginterface import jasperclient as jgc
+from pycaliper.jginterface.jasperclient import JasperSession
 from pycaliper.jginterface.jgoracle import setjwd
+from pycaliper.jginterface.jasperpool import JasperPool
+from pycaliper.jginterface.proofcache import ProofCache
+from pycaliper.jginterface.enginetuner import EngineTuner
+from pycaliper.jginterface.jasperreplay import (
+    SessionLog,
+    ReplayLog,
+    RecordingSession,
+    ReplaySession,
+)
 
 from pydantic import BaseModel
 
@@ -29,6 +39,7 @@ class PYCTask(Enum):
     CTRLSYNTH = 4
     PERSYNTH = 5
     FULLSYNTH = 6
+    TUNE = 7
 
 
 class PYCArgs(BaseModel):
@@ -37,6 +48,15 @@ class PYCArgs(BaseModel):
     params: str = ""
     sdir: str = ""
     port: int = 8080
+    pool: str = ""
+    cache: bool = False
+    tuning: bool = False
+    record: str = ""
+    replay: str = ""
+    time_limit: int = 0
+    background: bool = False
+    race: str = ""
+    granular: bool = False
     onetrace: bool = False
     bmc: bool = False
 
@@ -46,6 +66,29 @@ class PYConfig(BaseModel):
 
     # Is this a mock run (without Jasper access)?
     mock: bool = False
+    # Ports of additional Jasper servers to dispatch proofs to
+    pool: list[int] = []
+    # Reuse proof results from previous runs?
+    cache: bool = False
+    # Pick proof engines from the proof timings of previous runs (and record them)?
+    tuning: bool = False
+    # Log to record the Jasper sessions to
+    record: str = ""
+    # Log to replay the Jasper sessions from (instead of connecting to Jasper)
+    replay: str = ""
+    # Default time limit (in seconds) of each proof, 0 for none
+    time_limit: int = 0
+    # Run independent proofs as concurrent background jobs in a session?
+    background: bool = False
+    # Engine mixes to race across the main and pool sessions for hard properties
+    race: list[str] = []
+    # Prove one obligation per PER and invariant instead of the output properties?
+    granular: bool = False
+    # Engines of the bounded pre-check that rejects synthesis candidates with
+    # a counterexample before their full proof ("" for no pre-check)
+    precheck_engines: str = ""
+    # Time limit (in seconds) of the pre-check
+    precheck_time_limit: int = 10
 
     # Working directory
     # wdir : str = ""
@@ -56,6 +99,9 @@ class PYConfig(BaseModel):
     jdir: str = ""
     # Script to load in Jasper (relative to Jasper dir)
     script: str = ""
+    # Script that reloads the design after only the SVA file changed
+    # (relative to Jasper dir, full reload with script if empty)
+    reload: str = ""
     # Verification context to use in Jasper
     context: str = ""
     # PyCaliper SVA filepath to use (relative to pycaliper dir)
@@ -106,6 +152,17 @@ class PYCManager:
         self.num_spec_files = 0
         self.specs = {}
 
+        # Jasper session (None in mock mode)
+        self.jgs: JasperSession = None
+        # Pool of additional Jasper sessions (if any)
+        self.pool: JasperPool = None
+        # Proof result cache (if any)
+        self.cache: ProofCache = None
+        # Proof engine tuner (if any)
+        self.tuner: EngineTuner = None
+        # Log the Jasper sessions are recorded to (if any)
+        self.sessionlog: SessionLog = None
+
         if pyconfig.tdir != "":
             self.gather_all_traces(pyconfig.tdir)
 
@@ -149,11 +206,36 @@ class PYCManager:
             # Copy wdir to sdir
             os.system(f"cp -r {self.wdir}/. {self.sdir}/")
 
+    def jasper_stats(self) -> dict:
+        """Latency and traffic statistics of the Jasper sessions in this run"""
+        stats = {}
+        if self.jgs is not None:
+            stats["main"] = self.jgs.stats.to_dict()
+        if self.pool is not None:
+            stats["pool"] = self.pool.stats().to_dict()
+        return stats
+
     def close(self):
+        if self.jgs is not None:
+            path = f"{self.wdir}/jasper_stats.json"
+            with open(path, "w") as f:
+                json.dump(self.jasper_stats(), f, indent=4)
+            logger.info(f"Jasper session statistics written to {path}.")
         # Close the socket
         self.save()
-        if not self.pyconfig.mock:
-            jgc.close_tcp()
+        if self.jgs is not None:
+            self.jgs.close()
+        if self.pool is not None:
+            self.pool.close()
+        if self.cache is not None:
+            logger.info(f"Proof cache statistics: {self.cache.stats()}")
+            self.cache.close()
+        if self.tuner is not None:
+            logger.info(f"Proof engines picked per property class: {self.tuner.picked}")
+            self.tuner.close()
+        if self.sessionlog is not None:
+            self.sessionlog.close()
+            logger.info(f"Jasper sessions recorded to {self.sessionlog.path}.")
         logger.info("PyCaliper run completed, socket closed.")
 
 
@@ -167,8 +249,22 @@ CONFIG_SCHEMA = {
                 "jdir": {"type": "string"},
                 # The TCL script relative to the Jasper working directory
                 "script": {"type": "string"},
+                # TCL script that re-analyzes and re-elaborates the design after
+                # only the generated SVA file changed (optional)
+                "reload": {"type": "string"},
                 # Location of the generated SVA file relative to the Jasper working directory
                 "pycfile": {"type": "string"},
+                # Bounded pre-check of synthesis candidates before their full proof (optional)
+                "precheck": {
+                    "type": "object",
+                    "properties": {
+                        # Jasper engines of the pre-check (e.g. "B")
+                        "engines": {"type": "string"},
+                        # Time limit in seconds of the pre-check
+                        "time_limit": {"type": "integer"},
+                    },
+                    "required": ["engines"],
+                },
                 # Proof node context
                 "context": {"type": "string"},
             },
@@ -249,30 +345,45 @@ def create_module(specc, args):
         return getattr(mod, specmod)(**params)
 
 
-def mock_or_connect(pyconfig: PYConfig, port: int) -> bool:
+def mock_or_connect(
+    pyconfig: PYConfig, port: int, pool: JasperPool = None, factory=JasperSession
+) -> JasperSession:
     if pyconfig.mock:
         logger.info("Running in mock mode.")
-        return False
+        return None
     else:
-        jgc.connect_tcp("localhost", port)
-        setjwd(pyconfig.jdir)
-        return True
+        jgs = factory("localhost", port).connect()
+        setjwd(jgs, pyconfig.jdir, pool)
+        return jgs
 
 
 def get_pyconfig(config, args: PYCArgs) -> PYConfig:
     jasperc = config.get("jasper")
     specc = config.get("spec")
     tracec = config.get("trace", {})
+    precheckc = jasperc.get("precheck", {})
 
     return PYConfig(
         # Is this a mock run
         mock=args.mock,
+        pool=[int(p) for p in args.pool.split(",") if p != ""],
+        cache=args.cache,
+        tuning=args.tuning,
+        record=args.record,
+        replay=args.replay,
+        time_limit=args.time_limit,
+        background=args.background,
+        race=[m for m in args.race.split(",") if m != ""],
+        granular=args.granular,
         # Working directory
         # wdir=wdir.name,
         sdir=args.sdir,
         # Jasper configuration
         jdir=jasperc["jdir"],
         script=jasperc["script"],
+        reload=jasperc.get("reload", ""),
+        precheck_engines=precheckc.get("engines", ""),
+        precheck_time_limit=precheckc.get("time_limit", 10),
         context=jasperc["context"],
         pycfile=f'{jasperc["jdir"]}/{jasperc["pycfile"]}',
         # Spec config
@@ -309,10 +420,50 @@ def start(task: PYCTask, args: PYCArgs) -> tuple[PYConfig, PYCManager, Module]:
     module = create_module(config.get("spec"), args)
     assert module is not None, f"Module {config.get('spec')['pycspec']} not found."
 
-    is_connected = mock_or_connect(pyconfig, args.port)
+    # Sessions either talk to Jasper, record what they talk or replay a recording
+    factory = JasperSession
+    if pyconfig.replay != "":
+        factory = partial(ReplaySession, ReplayLog(pyconfig.replay))
+    elif pyconfig.record != "":
+        tmgr.sessionlog = SessionLog(pyconfig.record)
+        factory = partial(RecordingSession, tmgr.sessionlog)
+
+    if not pyconfig.mock and pyconfig.pool:
+        # Pool sessions restore the design elaborated in the main session
+        snapshot = f"{tmgr.wdir}/jasper_snapshot.jdb"
+        tmgr.pool = JasperPool(pyconfig.pool, factory=factory, snapshot=snapshot)
+
+    tmgr.jgs = mock_or_connect(pyconfig, args.port, tmgr.pool, factory)
+    is_connected = tmgr.jgs is not None
+
+    if is_connected:
+        tmgr.jgs.time_limit = pyconfig.time_limit
+        if tmgr.pool is not None:
+            for jgs in tmgr.pool.sessions:
+                jgs.time_limit = pyconfig.time_limit
+
+    if is_connected and pyconfig.cache:
+        tmgr.cache = ProofCache(pyconfig.jdir, pyconfig.script, pyconfig.pycfile)
+        tmgr.jgs.cache = tmgr.cache
+        if tmgr.pool is not None:
+            for jgs in tmgr.pool.sessions:
+                jgs.cache = tmgr.cache
+
+    if is_connected and pyconfig.tuning:
+        tmgr.tuner = EngineTuner(f"{pyconfig.jdir}/{pyconfig.script}")
+        tmgr.jgs.tuner = tmgr.tuner
+        if tmgr.pool is not None:
+            for jgs in tmgr.pool.sessions:
+                jgs.tuner = tmgr.tuner
 
     match task:
-        case PYCTask.VERIF1T | PYCTask.VERIF2T | PYCTask.PERSYNTH | PYCTask.CTRLSYNTH:
+        case (
+            PYCTask.VERIF1T
+            | PYCTask.VERIF2T
+            | PYCTask.PERSYNTH
+            | PYCTask.CTRLSYNTH
+            | PYCTask.TUNE
+        ):
             if not is_connected:
                 logger.error(
                     f"Task {task} requires Jasper sockets, cannot be run in mock mode."
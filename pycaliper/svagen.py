@@ -2,12 +2,21 @@
     Generate SVA (wires, assumes, asserts) for specifications in PER
 """
 
+import os
+import re
 import sys
+import glob
+import hashlib
 import logging
+import tempfile
+import itertools
+from typing import Iterable, Iterator
 from pydantic import BaseModel
 
-from .per import Module, Eq, Path, Context, PER, Inv, PERHole, AuxModule
+from .per import Module, Eq, ArrayEq, Path, Context, PER, Inv, PERHole, AuxModule
+from .per.cse import ExprCSE
 from .propns import *
+from .jginterface.designhash import file_hash
 
 logger = logging.getLogger(__name__)
 
@@ -57,18 +66,102 @@ def inv_sva(mod: Module, ctx: Context):
         sys.exit(1)
 
 
-class ModuleSpec(BaseModel):
-    # Module path
-    path: Path
-    input_spec_decl: str
-    state_spec_decl: str
-    output_spec_decl: str
-    input_inv_spec_decl_comp: str
-    state_inv_spec_decl_comp: str
-    output_inv_spec_decl_comp: str
-    input_inv_spec_decl_single: str
-    state_inv_spec_decl_single: str
-    output_inv_spec_decl_single: str
+def _shard_name(path: Path) -> str:
+    """Flat name of a module path, distinct for every path: underscores in names
+    are escaped as '_u', levels are joined by '__' and indices by '_'
+    (e.g. a.b_c[0] -> a__b_uc_0). The top module is '_root', which no path produces.
+    """
+    if not path.path:
+        return "_root"
+    return "__".join(
+        "_".join([s.replace("_", "_u")] + [str(i) for i in inds])
+        for (s, inds) in path.path
+    )
+
+
+def cse_sva(path: Path) -> str:
+    """Prefix of the wires of the common subexpressions of a module"""
+    return f"cse_{_shard_name(path)}"
+
+
+# Tag of the shard file names, so that only generated files are ever removed
+SHARD_TAG = "pycshard"
+
+
+def shard_path(pycfile: str, path: Path) -> str:
+    """Path of the SVA shard of a module, next to the top SVA file
+    (e.g. regblock.pyc.sv -> regblock.pyc.pycshard.reg1.sv)"""
+    return f"{os.path.splitext(pycfile)[0]}.{SHARD_TAG}.{_shard_name(path)}.sv"
+
+
+def spec_files(pycfile: str) -> list[str]:
+    """The top SVA file and the module shards it includes"""
+    pattern = f"{glob.escape(os.path.splitext(pycfile)[0])}.{SHARD_TAG}.*.sv"
+    return [pycfile] + sorted(glob.glob(pattern))
+
+
+class SpecWriter:
+    """Streams a generated file into a temporary file next to it, hashing
+    the content on the way. Closing the writer replaces the file atomically,
+    unless the file already has the same content. Used as a context manager,
+    the temporary file is removed if the writer is not closed (e.g. on error)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.hash = hashlib.sha256()
+        fd, self.tmp = tempfile.mkstemp(
+            dir=os.path.dirname(path) or ".",
+            prefix=f".{os.path.basename(path)}.",
+            suffix=".tmp",
+        )
+        self.f = os.fdopen(fd, "wb")
+        self.closed = False
+
+    def __enter__(self) -> "SpecWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self.closed:
+            self.discard()
+
+    def discard(self):
+        """Drop the written content, leaving the file as it was"""
+        self.f.close()
+        os.remove(self.tmp)
+        self.closed = True
+
+    def write(self, s: str):
+        data = s.encode("utf-8")
+        self.hash.update(data)
+        self.f.write(data)
+
+    def writelines(self, parts: Iterable[str]):
+        for s in parts:
+            self.write(s)
+
+    def close(self) -> tuple[str, bool]:
+        """
+        Returns:
+            tuple[str, bool]: hash of the content and whether the file was written
+        """
+        self.f.close()
+        self.closed = True
+        digest = self.hash.hexdigest()
+        if file_hash(self.path) == digest:
+            os.remove(self.tmp)
+            return digest, False
+        os.chmod(self.tmp, 0o644)
+        os.replace(self.tmp, self.path)
+        return digest, True
+
+
+def _conj(terms: Iterable[str]) -> Iterator[str]:
+    """Stream the conjunction of terms: (t1 && t2 && ... && 1'b1)"""
+    yield "(\n\t"
+    for term in terms:
+        yield term
+        yield " && \n\t"
+    yield "1'b1)"
 
 
 class SVAContext(BaseModel):
@@ -79,22 +172,35 @@ class SVAContext(BaseModel):
     asrts_1trace: list[str] = []
     assms_bmc: list[str] = []
     asrts_bmc: list[str] = []
+    # Granular obligations (one per PER or invariant) of the output properties
+    obligations_2trace: list[str] = []
+    obligations_1trace: list[str] = []
 
 
 class SVAGen:
     def __init__(self, topmod: Module) -> None:
         self.topmod = topmod
-        self.specs: dict[Path, ModuleSpec] = {}
+        # Shard of each module (submodules first)
+        self.specs: dict[Path, str] = {}
 
         self.holes: dict[str, PERHole] = {}
 
         self.property_context = SVAContext()
 
+        # Content hash of each generated file (top file and module shards)
+        self.hashes: dict[str, str] = {}
+        # Files written by the last generation (the others were unchanged)
+        self.written: list[str] = []
+        # Key of each granular obligation: hash of its expression and of
+        # everything it is proven under (the input and state specification)
+        self.obligations: dict[str, str] = {}
+
     def _generate_decls_for_per(self, per: PER):
         declbase = per.logic.get_hier_path_nonindex()
         declfull = per.logic.get_hier_path("_")
         if per.logic.is_arr_elem():
-            declsize = f"[0:{per.logic.parent.size-1}]"
+            arr = per.logic.parent
+            declsize = f"[{arr.base}:{arr.base+arr.size-1}]"
         else:
             declsize = ""
         if isinstance(per, Eq):
@@ -106,122 +212,139 @@ class SVAGen:
             declname = condeq_sva(declbase)
         return (wirename, declname, declsize)
 
-    def _gen_1t_single(self, mod: Module, invs: list[Inv], ctx: Context, a: str = "a"):
-        inv_exprs = []
-        for inv in invs:
-            inv_exprs.append(inv.get_sva(a))
-        inv_spec = "(\n\t" + " && \n\t".join(inv_exprs + ["1'b1"]) + ")"
-        return f"wire {inv_sva(mod, ctx)} = {inv_spec};"
-
-    def _gen_1t_comp(
-        self, mod: Module, invs: list[Inv], ctx: Context, a: str = "a", b: str = "b"
-    ):
-        inv_exprs = []
-        for inv in invs:
-            inv_exprs.append(inv.get_sva(a))
-            inv_exprs.append(inv.get_sva(b))
-        inv_spec = "(\n\t" + " && \n\t".join(inv_exprs + ["1'b1"]) + ")"
-        return f"wire {inv_sva(mod, ctx)} = {inv_spec};"
-
-    def _gen_2t_comp(
-        self, mod: Module, pers: list[PER], ctx: Context, a: str = "a", b: str = "b"
-    ):
-        assigns_ = {}
-        decls_ = {}
-        declwires_ = []
-        for per in pers:
-            (wirename, declname, declsize) = self._generate_decls_for_per(per)
-            exprname = per.get_sva(a, b)
-            assigns_[wirename] = f"assign {wirename} = ({exprname});"
-            decls_[declname] = f"logic {declname} {declsize};"
-            declwires_.append(wirename)
-        svaspec = "(\n\t" + " && \n\t".join(declwires_ + ["1'b1"]) + ")"
-        topdecl = f"wire {per_sva(mod, ctx)} = {svaspec};"
-        return (assigns_, decls_, topdecl)
-
-    def _generate_decls(self, mod: Module, a: str = "a", b: str = "b"):
-
+    def _generate_decls_for_arrper(self, per: ArrayEq) -> str:
+        """Name of the wire of an array PER (a packed vector with a bit per element)"""
+        name = per.arr.path.get_hier_path_flatindex()
+        name = eq_sva(name) if per.cond is None else condeq_sva(name)
+        if per.is_whole():
+            return f"{name}_all"
+        first, last = min(per.indices), max(per.indices)
+        return f"{name}_{first}_{last}_{abs(per.indices.step)}"
+
+    def _gen_arrper(
+        self, per: ArrayEq, wirename: str, a: str, b: str, cse: ExprCSE
+    ) -> Iterator[str]:
+        """Stream the generate loop that assigns the wire of an array PER"""
+        first, step = per.indices[0], per.indices.step
+        offset = "i" if abs(step) == 1 else f"{abs(step)}*i"
+        if first == 0 and step > 0:
+            index = offset
+        else:
+            index = f"{first} {'+' if step > 0 else '-'} {offset}"
+        yield f"logic [{len(per.indices)-1}:0] {wirename};\n"
+        yield "generate\n"
+        yield f"\tfor (genvar i = 0; i < {len(per.indices)}; i = i + 1) begin : gen_{wirename}\n"
+        yield f"\t\tassign {wirename}[i] = ({per.get_sva(a, b, index=index, render=cse.render)});\n"
+        yield "\tend\n"
+        yield "endgenerate\n"
+
+    def _per_term(self, per: PER) -> str:
+        """Term of a PER in the conjunction of its module's spec wire"""
+        if isinstance(per, ArrayEq):
+            return f"(&{self._generate_decls_for_arrper(per)})"
+        return self._generate_decls_for_per(per)[0]
+
+    def _walk(self, mod: Module) -> Iterator[Module]:
+        """Modules of the hierarchy under mod, submodules first"""
         # Holes are not currently supported in submodules
         if mod != self.topmod and len(mod._perholes) != 0:
             logger.error(
                 f"Holes not supported yet in sub-modules: found one in {mod.path}"
             )
             sys.exit(1)
-
-        # Wire declarations for invariants
-        decls = {}
-        # Assignments to invariant wires
-        assigns = {}
-        # Generate recursively for submodules
         for _, submod in mod._submodules.items():
-            (inner_decls, inner_assigns) = self._generate_decls(submod, a, b)
-            decls.update(inner_decls)
-            assigns.update(inner_assigns)
-
-        # Generate wires for current modules
-        (assigns_, decls_, input_decl) = self._gen_2t_comp(
-            mod, mod._pycinternal__input, Context.INPUT, a, b
-        )
-        assigns.update(assigns_)
-        decls.update(decls_)
-
-        (assigns_, decls_, state_decl) = self._gen_2t_comp(
-            mod, mod._pycinternal__state, Context.STATE, a, b
-        )
-        assigns.update(assigns_)
-        decls.update(decls_)
-
-        (assigns_, decls_, output_decl) = self._gen_2t_comp(
-            mod, mod._pycinternal__output, Context.OUTPUT, a, b
-        )
-        assigns.update(assigns_)
-        decls.update(decls_)
-
-        for hole in mod._perholes:
-            if hole.active:
-                (wirename, declname, declsize) = self._generate_decls_for_per(hole.per)
-                exprname = hole.per.get_sva(a, b)
-                assigns[wirename] = f"assign {wirename} = ({exprname});"
-                decls[declname] = f"logic {declname} {declsize};"
-
-        input_inv_decl_comp = self._gen_1t_comp(
-            mod, mod._pycinternal__input_invs, Context.INPUT, a, b
-        )
-        state_inv_decl_comp = self._gen_1t_comp(
-            mod, mod._pycinternal__state_invs, Context.STATE, a, b
-        )
-        output_inv_decl_comp = self._gen_1t_comp(
-            mod, mod._pycinternal__output_invs, Context.OUTPUT, a, b
-        )
-
-        input_inv_decl_single = self._gen_1t_single(
-            mod, mod._pycinternal__input_invs, Context.INPUT, a
-        )
-        state_inv_decl_single = self._gen_1t_single(
-            mod, mod._pycinternal__state_invs, Context.STATE, a
-        )
-        output_inv_decl_single = self._gen_1t_single(
-            mod, mod._pycinternal__output_invs, Context.OUTPUT, a
-        )
-
-        self.specs[mod.path] = ModuleSpec(
-            path=mod.path,
-            input_spec_decl=input_decl,
-            state_spec_decl=state_decl,
-            output_spec_decl=output_decl,
-            input_inv_spec_decl_comp=input_inv_decl_comp,
-            state_inv_spec_decl_comp=state_inv_decl_comp,
-            output_inv_spec_decl_comp=output_inv_decl_comp,
-            input_inv_spec_decl_single=input_inv_decl_single,
-            state_inv_spec_decl_single=state_inv_decl_single,
-            output_inv_spec_decl_single=output_inv_decl_single,
-        )
+            yield from self._walk(submod)
+        yield mod
 
-        return (decls, assigns)
+    def _module_wires(
+        self, mod: Module, declared: set, a: str, b: str, onetrace: bool
+    ) -> Iterator[str]:
+        """Stream the shard of a module: the wires of its PERs (those not
+        declared by a submodule already) and its input/state/output spec wires.
+        Boolean subexpressions used more than once by the PER conditions and
+        invariants of the module are hoisted into wires of their own.
 
-    def generate_decls(self, a: str = "a", b: str = "b"):
+        Args:
+            mod (Module): module to generate the wires for
+            declared (set): ("logic" | "assign", name) of the wires generated so far
+            a (str): name of the first trace
+            b (str): name of the second trace
+            onetrace (bool): generate the invariant wires for a single trace
+        """
+        yield f"// Module {mod.get_hier_path()}\n\n"
+
+        pers = [
+            mod._pycinternal__input,
+            mod._pycinternal__state,
+            mod._pycinternal__output,
+        ]
+        invs = [
+            mod._pycinternal__input_invs,
+            mod._pycinternal__state_invs,
+            mod._pycinternal__output_invs,
+        ]
+        holes = [hole.per for hole in mod._perholes if hole.active]
+
+        # PERs whose wires are assigned in this shard
+        assigned = []
+        for per in itertools.chain(*pers, holes):
+            if isinstance(per, ArrayEq):
+                wirename = self._generate_decls_for_arrper(per)
+            else:
+                wirename = self._generate_decls_for_per(per)[0]
+            if ("assign", wirename) not in declared:
+                declared.add(("assign", wirename))
+                assigned.append((per, wirename))
+
+        # Count the uses of the subexpressions of everything rendered below
+        cse = ExprCSE(cse_sva(mod.path))
+        for per, _ in assigned:
+            if getattr(per, "cond", None) is not None:
+                cse.add(per.cond, a)
+                cse.add(per.cond, b)
+        for inv in itertools.chain(*invs):
+            if isinstance(inv, Inv):
+                cse.add(inv.expr, a)
+                if not onetrace:
+                    cse.add(inv.expr, b)
+        yield from cse.wires()
+
+        for per, wirename in assigned:
+            if isinstance(per, ArrayEq):
+                # One generate loop per array rather than a wire per element
+                yield from self._gen_arrper(per, wirename, a, b, cse)
+                continue
+            (_, declname, declsize) = self._generate_decls_for_per(per)
+            if ("logic", declname) not in declared:
+                declared.add(("logic", declname))
+                yield f"logic {declname} {declsize};\n"
+            yield f"assign {wirename} = ({per.get_sva(a, b, render=cse.render)});\n"
+        yield "\n"
+
+        ctxs = [Context.INPUT, Context.STATE, Context.OUTPUT]
+        for ctx, ctxpers in zip(ctxs, pers):
+            yield f"wire {per_sva(mod, ctx)} = "
+            yield from _conj(self._per_term(per) for per in ctxpers)
+            yield ";\n"
+
+        for ctx, ctxinvs in zip(ctxs, invs):
+            if onetrace:
+                terms = (inv.get_sva(a, render=cse.render) for inv in ctxinvs)
+            else:
+                terms = (
+                    t
+                    for inv in ctxinvs
+                    for t in (
+                        inv.get_sva(a, render=cse.render),
+                        inv.get_sva(b, render=cse.render),
+                    )
+                )
+            yield f"wire {inv_sva(mod, ctx)} = "
+            yield from _conj(terms)
+            yield ";\n"
 
-        properties = []
+    def generate_props(self) -> Iterator[str]:
+        """Stream the assumptions and assertions of the top module"""
 
         input_props_1t = f"{inv_sva(self.topmod, Context.INPUT)}"
         state_props_1t = f"{inv_sva(self.topmod, Context.STATE)}"
@@ -231,33 +354,33 @@ class SVAGen:
         state_props_2t = f"{per_sva(self.topmod, Context.STATE)} && {state_props_1t}"
         output_props_2t = f"{per_sva(self.topmod, Context.OUTPUT)} && {output_props_1t}"
 
-        properties.append(
+        yield (
             f"{get_as_assm(TOP_INPUT_1T_PROP)} : assume property\n"
             + f"\t({input_props_1t});"
         )
         self.property_context.assms_1trace.append(TOP_INPUT_1T_PROP)
-        properties.append(
+        yield (
             f"{get_as_assm(TOP_STATE_1T_PROP)} : assume property\n"
             + f"\t(!({STEP_SIGNAL}) |-> ({state_props_1t}));"
         )
         self.property_context.assms_1trace.append(TOP_STATE_1T_PROP)
-        properties.append(
+        yield (
             f"{get_as_prop(TOP_OUTPUT_1T_PROP)} : assert property\n"
             + f"\t({STEP_SIGNAL} |-> ({state_props_1t} && {output_props_1t}));"
         )
         self.property_context.asrts_1trace.append(TOP_INPUT_1T_PROP)
 
-        properties.append(
+        yield (
             f"{get_as_assm(TOP_INPUT_2T_PROP)} : assume property\n"
             + f"\t({input_props_2t});"
         )
         self.property_context.assms_2trace.append(TOP_INPUT_2T_PROP)
-        properties.append(
+        yield (
             f"{get_as_assm(TOP_STATE_2T_PROP)} : assume property\n"
             + f"\t(!({STEP_SIGNAL}) |-> ({state_props_2t}));"
         )
         self.property_context.assms_2trace.append(TOP_STATE_2T_PROP)
-        properties.append(
+        yield (
             f"{get_as_prop(TOP_OUTPUT_2T_PROP)} : assert property\n"
             + f"\t({STEP_SIGNAL} |-> ({state_props_2t} && {output_props_2t}));"
         )
@@ -277,14 +400,84 @@ class SVAGen:
                     self.holes[
                         eq_sva(hole.per.logic.get_hier_path_flatindex())
                     ] = hole.per.logic
-                    properties.extend([assm_prop, asrt_prop])
+                    yield assm_prop
+                    yield asrt_prop
                     self.property_context.holes.append(
                         f"{eq_sva(hole.per.logic.get_hier_path_flatindex())}"
                     )
 
-        return properties, self._generate_decls(self.topmod, a, b)
+    def _assms_hash(self, k: int, a: str, b: str) -> str:
+        """Hash of the specification the obligations are proven under: the
+        input and state PERs and invariants, the step counter and auxiliary modules"""
+        h = hashlib.sha256(self.counter_step(k).encode("utf-8"))
+        for _, aux_mod in self.topmod._auxmodules.items():
+            h.update(aux_mod.get_instance_str(a).encode("utf-8"))
+        top = self.topmod
+        for per in itertools.chain(top._pycinternal__input, top._pycinternal__state):
+            h.update(f"{self._per_term(per)}: {per.get_sva(a, b)}\n".encode("utf-8"))
+        for ctx, invs in [
+            (Context.INPUT, top._pycinternal__input_invs),
+            (Context.STATE, top._pycinternal__state_invs),
+        ]:
+            for inv in invs:
+                h.update(f"{ctx.name}: {inv.get_sva(a)}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    def generate_obligations(
+        self, k: int, a: str = "a", b: str = "b", onetrace: bool = False
+    ) -> Iterator[str]:
+        """Stream one assertion per state and output PER and invariant of the
+        top module (the conjuncts of the output properties), so that they can
+        be proven (and their results cached) independently
+
+        Args:
+            k (int): Number of steps
+            a (str, optional): Name of the first trace. Defaults to "a".
+            b (str, optional): Name of the second trace. Defaults to "b".
+            onetrace (bool, optional): invariants over a single trace. Defaults to False.
+        """
+        assms = self._assms_hash(k, a, b)
+        top = self.topmod
+
+        def obligation(prop: str, expr: str, definition: str) -> str:
+            # The key hashes the definition of what is asserted (the term of
+            # a PER is only the name of its wire)
+            self.obligations[prop] = hashlib.sha256(
+                f"{assms}\n{prop}\n{definition}".encode("utf-8")
+            ).hexdigest()
+            return (
+                f"{get_as_prop(prop)} : assert property\n"
+                + f"\t({STEP_SIGNAL} |-> {expr});"
+            )
 
-    def generate_step_decls(self, k: int, a: str = "a") -> list[str]:
+        for ctx, pers in [
+            (TOP_STATE_2T_PROP, top._pycinternal__state),
+            (TOP_OUTPUT_2T_PROP, top._pycinternal__output),
+        ]:
+            for per in pers:
+                term = self._per_term(per)
+                prop = OBLIGATION_PROP(ctx, re.sub(r"\W+", "_", term).strip("_"))
+                if prop not in self.obligations:
+                    yield obligation(prop, term, per.get_sva(a, b))
+                    self.property_context.obligations_2trace.append(prop)
+
+        for ctx, invs in [
+            (TOP_STATE_1T_PROP, top._pycinternal__state_invs),
+            (TOP_OUTPUT_1T_PROP, top._pycinternal__output_invs),
+        ]:
+            for inv in invs:
+                expr = inv.get_sva(a)
+                name = hashlib.sha256(expr.encode("utf-8")).hexdigest()[:8]
+                prop = OBLIGATION_PROP(ctx, name)
+                if prop not in self.obligations:
+                    if not onetrace:
+                        expr = f"{expr} && {inv.get_sva(b)}"
+                    yield obligation(prop, f"({expr})", expr)
+                    self.property_context.obligations_1trace.append(prop)
+                    if not onetrace:
+                        self.property_context.obligations_2trace.append(prop)
+
+    def generate_step_decls(self, k: int, a: str = "a") -> Iterator[str]:
         """
         Generate properties for each step in the simulation
 
@@ -293,34 +486,28 @@ class SVAGen:
             a (str, optional): Name of the first trace. Defaults to "a".
 
         Returns:
-            list[str]: List of properties for each step
+            Iterator[str]: properties for each step
         """
-        properties = []
         for i in range(min(k, len(self.topmod._pycinternal__simsteps))):
-            assumes = [
-                expr.get_sva(a)
-                for expr in self.topmod._pycinternal__simsteps[i]._pycinternal__assume
-            ]
-            assume_spec = "(\n\t" + " && \n\t".join(assumes + ["1'b1"]) + ")"
-            asserts = [
-                expr.get_sva(a)
-                for expr in self.topmod._pycinternal__simsteps[i]._pycinternal__assert
-            ]
-            assert_spec = "(\n\t" + " && \n\t".join(asserts + ["1'b1"]) + ")"
-
-            properties.append(
+            step = self.topmod._pycinternal__simsteps[i]
+            assume_spec = "".join(
+                _conj(e.get_sva(a) for e in step._pycinternal__assume)
+            )
+            assert_spec = "".join(
+                _conj(e.get_sva(a) for e in step._pycinternal__assert)
+            )
+
+            yield (
                 f"{get_as_assm(TOP_STEP_PROP(i))} : assume property\n"
                 + f"\t({step_signal(i)} |-> {assume_spec});"
             )
             self.property_context.assms_bmc.append(TOP_STEP_PROP(i))
-            properties.append(
+            yield (
                 f"{get_as_prop(TOP_STEP_PROP(i))} : assert property\n"
                 + f"\t({step_signal(i)} |-> {assert_spec});"
             )
             self.property_context.asrts_bmc.append(TOP_STEP_PROP(i))
 
-        return properties
-
     def counter_step(self, k: int):
         # Create a counter with k steps
         counter_width = len(bin(k)) - 2
@@ -342,57 +529,79 @@ class SVAGen:
             vlog += f"\tlogic {step_signal(i)} = ({COUNTER} == {counter_width}'d{i});\n"
         return vlog
 
+    def _close(self, writer: SpecWriter):
+        self.hashes[writer.path], written = writer.close()
+        if written:
+            self.written.append(writer.path)
+
     def create_pyc_specfile(
-        self, k: int, a="a", b="b", filename="temp.pyc.sv", onetrace=False
-    ):
+        self,
+        k: int,
+        a="a",
+        b="b",
+        filename="temp.pyc.sv",
+        onetrace=False,
+        granular=False,
+    ) -> dict[str, str]:
+        """Generate the SVA spec: a top file (filename) that includes one shard
+        per module. Files are written atomically and only if their content changed.
+        With granular, the top file also has one assertion per state and output
+        PER and invariant (see generate_obligations), next to the aggregate ones.
 
-        vlog = self.counter_step(k)
+        Returns:
+            dict[str, str]: content hash of each generated file
+        """
 
         self.topmod.instantiate()
-        properties, all_decls = self.generate_decls(a, b)
-        properties.extend(self.generate_step_decls(k, a))
-
-        aux_modules = []
-        # Get auxiliary modules if any
-        for _, aux_mod in self.topmod._auxmodules.items():
-            aux_modules.append(aux_mod.get_instance_str(a))
-
-        with open(filename, "w") as f:
-            f.write(vlog + "\n")
-
-            for assign in all_decls[0].values():
-                f.write(assign + "\n")
-            for decl in all_decls[1].values():
-                f.write(decl + "\n")
 
+        # The files are streamed as the module tree is walked: one shard per
+        # module with its wires, and the top file that includes them
+        self.specs = {}
+        self.hashes = {}
+        self.written = []
+        # Wires shared with a submodule are declared in the submodule's shard
+        declared = set()
+        for mod in self._walk(self.topmod):
+            shard = shard_path(filename, mod.path)
+            with SpecWriter(shard) as writer:
+                writer.writelines(self._module_wires(mod, declared, a, b, onetrace))
+                self._close(writer)
+            self.specs[mod.path] = shard
+
+        with SpecWriter(filename) as writer:
+            writer.write(self.counter_step(k) + "\n")
             # Write auxiliary modules
-            f.write("\n")
-            f.write("/////////////////////////////////////\n")
-            f.write("// Auxiliary modules\n")
-            for aux_mod in aux_modules:
-                f.write(aux_mod + "\n")
-
-            for mod, spec in self.specs.items():
-                f.write("\n")
-                f.write(f"/////////////////////////////////////\n")
-                f.write(f"// Module {mod.get_hier_path()}\n")
-                f.write("\n")
-                f.write(spec.input_spec_decl + "\n")
-                f.write(spec.state_spec_decl + "\n")
-                f.write(spec.output_spec_decl + "\n")
-                if not onetrace:
-                    f.write(spec.input_inv_spec_decl_comp + "\n")
-                    f.write(spec.state_inv_spec_decl_comp + "\n")
-                    f.write(spec.output_inv_spec_decl_comp + "\n")
-                else:
-                    f.write(spec.input_inv_spec_decl_single + "\n")
-                    f.write(spec.state_inv_spec_decl_single + "\n")
-                    f.write(spec.output_inv_spec_decl_single + "\n")
-
-            f.write("\n")
-            f.write("/////////////////////////////////////\n")
-            f.write("// Assumptions and Assertions for top module\n")
-            f.write("\n\n".join(properties))
-            f.write("\n")
-
-        logger.info(f"Generated spec file: {filename}")
+            writer.write("/////////////////////////////////////\n")
+            writer.write("// Auxiliary modules\n")
+            for _, aux_mod in self.topmod._auxmodules.items():
+                writer.write(aux_mod.get_instance_str(a) + "\n")
+            writer.write("\n/////////////////////////////////////\n")
+            writer.write("// Module shards\n")
+            for shard in self.specs.values():
+                writer.write(f'`include "{os.path.basename(shard)}"\n')
+            writer.write("\n/////////////////////////////////////\n")
+            writer.write("// Assumptions and Assertions for top module\n")
+            props = itertools.chain(
+                self.generate_props(), self.generate_step_decls(k, a)
+            )
+            self.obligations = {}
+            self.property_context.obligations_2trace = []
+            self.property_context.obligations_1trace = []
+            if granular:
+                props = itertools.chain(
+                    props, self.generate_obligations(k, a, b, onetrace)
+                )
+            for i, prop in enumerate(props):
+                writer.write(("\n\n" if i > 0 else "") + prop)
+            writer.write("\n")
+            self._close(writer)
+
+        # Remove the shards of modules that are no longer generated
+        for path in spec_files(filename)[1:]:
+            if path not in self.hashes:
+                os.remove(path)
+
+        logger.info(
+            f"Generated spec file: {filename} ({len(self.written)} of {len(self.hashes)} files changed)"
+        )
+        return self.hashes
@@ -8,7 +8,8 @@ from ..pycmanager import PYConfig
 from ..vcdutils import get_subtrace
 from ..pycmanager import PYCManager
 
-from ..jginterface.jgoracle import prove, is_pass, create_vcd_trace
+from ..jginterface.jasperclient import JasperSession
+from ..jginterface.jgoracle import prove_wctx, is_pass, create_vcd_trace
 
 from .synthprog import ZDDLUTSynthProgram
 
@@ -16,9 +17,10 @@ logger = logging.getLogger(__name__)
 
 
 class AlignSynthesizer:
-    def __init__(self, tmgr: PYCManager, pyconf: PYConfig) -> None:
+    def __init__(self, tmgr: PYCManager, pyconf: PYConfig, jgs: JasperSession) -> None:
         self.pyconf = pyconf
         self.tmgr = tmgr
+        self.jgs = jgs
         # Top module
         self.topmod = None
 
@@ -38,15 +40,15 @@ class AlignSynthesizer:
                 sys.exit(1)
             return vcd_path
 
-        # Check property
-        res = prove(self.pyconf.tgprop)
+        # Check property (the trace is generated from this proof, so it must run)
+        res = prove_wctx(self.jgs, self.pyconf.tgprop, use_cache=False)
         if is_pass(res):
             logger.error("Property is SAFE, no traces!")
             sys.exit(1)
 
         # Grab the trace
         vcd_path = self.tmgr.create_vcd_path()
-        res = create_vcd_trace(self.pyconf.tgprop, vcd_path)
+        res = create_vcd_trace(self.jgs, self.pyconf.tgprop, vcd_path)
         logger.debug(f"Trace generated at {vcd_path}.")
 
         return vcd_path
@@ -1,7 +1,7 @@
 import sys
 import logging
 
-from ..per import Module, Eq, CondEq
+from ..per import Module, Eq, CondEq, per_elems
 
 from ..btorinterface.pycbtorsymex import PYCBTORSymex
 
@@ -40,13 +40,13 @@ class BTORSynthesizer:
         condeq_assrts = []
 
         # Generate the assumptions and assertions
-        for p in self.topmod._pycinternal__input:
+        for p in per_elems(self.topmod._pycinternal__input):
             match p:
                 case Eq():
                     eq_assms.append(p.logic)
                 case CondEq():
                     condeq_assms.append((p.cond, p.logic))
-        for p in self.topmod._pycinternal__state:
+        for p in per_elems(self.topmod._pycinternal__state):
             match p:
                 case Eq():
                     eq_assms.append(p.logic)
@@ -54,7 +54,7 @@ class BTORSynthesizer:
                 case CondEq():
                     condeq_assms.append((p.cond, p.logic))
                     condeq_assrts.append((p.cond, p.logic))
-        for p in self.topmod._pycinternal__output:
+        for p in per_elems(self.topmod._pycinternal__output):
             match p:
                 case Eq():
                     eq_assrts.append(p.logic)
@@ -5,17 +5,22 @@
 import logging
 
 from ..pycmanager import PYConfig
+from ..jginterface.jasperclient import JasperSession
+from ..jginterface.jasperpool import JasperPool
 
 from ..per import Module, PERHole, Context
 
 from pycaliper.svagen import SVAGen
 from pycaliper.jginterface.jgoracle import (
-    prove,
+    ProofResult,
+    prove_many,
+    prove_async,
+    wait_all,
     prove_out_induction_2t,
     set_assm_induction_2t,
     is_pass,
     enable_assm,
-    disable_assm,
+    set_assms,
     loadscript,
 )
 
@@ -67,8 +72,17 @@ class SynthesisTree:
 
 
 class PERSynthesizer:
-    def __init__(self, psconf: PYConfig) -> None:
+
+    # Times the proof of undecided candidates is retried with a doubled time limit
+    MAX_RETRIES = 2
+
+    def __init__(
+        self, psconf: PYConfig, jgs: JasperSession, pool: JasperPool = None
+    ) -> None:
         self.psc = psconf
+        self.jgs = jgs
+        # Pool of sessions to spread candidate proofs across
+        self.pool = pool
         self.svagen = None
         self.candidates: dict[str, PERHole] = {}
 
@@ -76,27 +90,94 @@ class PERSynthesizer:
         self.minfuel = SynthesisTree.MAXFUEL
 
         self.synstate: SynthesisTree = SynthesisTree()
+        # Number of candidates rejected by the pre-check (full proofs saved)
+        self.saved_proofs = 0
+
+    def _prove_cands(
+        self, cands: list[str], time_limit: int, precheck=True
+    ) -> list[ProofResult]:
+        """Prove candidates. With a pre-check configured, candidates are first
+        checked with the (bounded) pre-check engines and those with a
+        counterexample are rejected without a full proof."""
+        results: dict[str, ProofResult] = {}
+        if precheck and self.psc.precheck_engines != "" and cands:
+            checked = self._prove_tier(
+                cands, self.psc.precheck_time_limit, self.psc.precheck_engines
+            )
+            results = {c: r for c, r in zip(cands, checked) if r == ProofResult.CEX}
+            self.saved_proofs += len(results)
+            logger.debug(f"Pre-check rejected {list(results)}")
+        todo = [c for c in cands if c not in results]
+        results.update(zip(todo, self._prove_tier(todo, time_limit)))
+        return [results[c] for c in cands]
+
+    def _prove_tier(
+        self, cands: list[str], time_limit: int, engines: str = ""
+    ) -> list[ProofResult]:
+        """Prove candidates in one multi-property proof on the main session
+        (or as concurrent background jobs), or split across the pool."""
+        if not cands:
+            return []
+        if engines != "":
+            # Pre-checks are short, they are not run as background jobs
+            if self.pool is not None:
+                return self.pool.prove_many(
+                    self.psc.context, cands, time_limit, engines
+                )
+            return prove_many(self.jgs, self.psc.context, cands, time_limit, engines)
+        if self.pool is not None:
+            return self.pool.prove_many(self.psc.context, cands, time_limit)
+        if self.psc.background:
+            return wait_all(
+                [prove_async(self.jgs, self.psc.context, c, time_limit) for c in cands]
+            )
+        return prove_many(self.jgs, self.psc.context, cands, time_limit)
 
     def _saturate(self):
-        added = True
-        while added:
-            added = False
-            for cand in self.candidates:
-                if cand not in self.synstate.asrts:
-                    if is_pass(prove(self.psc.context, cand)):
-                        added = True
-                        self.synstate.add_asrt(cand)
-                        if self.synstate.add_secondary_assm(cand):
-                            enable_assm(self.psc.context, cand)
-                        logger.debug(f"Added assertion {cand} to synthesis node")
-                        break
+        cands = [c for c in self.candidates if c not in self.synstate.asrts]
+        time_limit = self.psc.time_limit
+        retries = 0
+        while cands:
+            # Retried candidates already passed the pre-check
+            results = self._prove_cands(cands, time_limit, precheck=retries == 0)
+            # Candidates that pass keep passing under more assumptions, so all
+            # of them are added before the remaining candidates are reproved
+            passed = [c for c, r in zip(cands, results) if is_pass(r)]
+            if passed:
+                enabled = []
+                for cand in passed:
+                    self.synstate.add_asrt(cand)
+                    if self.synstate.add_secondary_assm(cand):
+                        enabled.append(cand)
+                    logger.debug(f"Added assertion {cand} to synthesis node")
+                if enabled:
+                    set_assms(self.jgs, self.psc.context, enabled, [], self.pool)
+                cands = [c for c in self.candidates if c not in self.synstate.asrts]
+                time_limit = self.psc.time_limit
+                retries = 0
+            elif time_limit > 0 and retries < self.MAX_RETRIES:
+                # Retry the candidates that ran out of time with a larger budget
+                cands = [c for c, r in zip(cands, results) if r == ProofResult.UNKNOWN]
+                time_limit *= 2
+                retries += 1
+                if cands:
+                    logger.debug(f"Retrying {cands} with a time limit of {time_limit}s")
+            else:
+                undecided = [
+                    c for c, r in zip(cands, results) if r == ProofResult.UNKNOWN
+                ]
+                if undecided:
+                    logger.warning(
+                        f"Giving up on undecided candidates {undecided} (time limit {time_limit}s)"
+                    )
+                break
 
     def _dive(self, cand):
         self.synstate.add_child(cand)
         self.synstate = self.synstate.children[cand]
         logger.debug(f"Dived to new state: {self.synstate} on candidate: {cand}")
         self.depth += 1
-        enable_assm(self.psc.context, cand)
+        enable_assm(self.jgs, self.psc.context, cand, self.pool)
         logger.debug(
             f"Saturating curr. synstate: {self.synstate}, with assms: {self.synstate.assms}"
         )
@@ -115,8 +196,7 @@ class PERSynthesizer:
                 f"Backtracked to state: {self.synstate} on "
                 + f"inheritance: {cand}, and secondaries: {secondaries}"
             )
-            for c in [cand] + secondaries:
-                disable_assm(self.psc.context, c)
+            set_assms(self.jgs, self.psc.context, [], [cand] + secondaries, self.pool)
             self.depth -= 1
             return True
         else:
@@ -128,7 +208,7 @@ class PERSynthesizer:
     def safe(self):
         if not self.synstate.checked:
             self.synstate.checked = True
-            return is_pass(prove_out_induction_2t(self.psc.context))
+            return is_pass(prove_out_induction_2t(self.jgs, self.psc.context))
         return False
 
     def _synthesize(self):
@@ -173,13 +253,22 @@ class PERSynthesizer:
         self.svagen.create_pyc_specfile(k=self.psc.k, filename=self.psc.pycfile)
         self.candidates = self.svagen.holes
 
-        loadscript(self.psc.script)
+        loadscript(
+            self.jgs, self.psc.script, self.pool, self.psc.pycfile, self.psc.reload
+        )
 
         # Enable and disable the right assumptions
-        set_assm_induction_2t(self.psc.context, self.svagen.property_context)
+        set_assm_induction_2t(
+            self.jgs, self.psc.context, self.svagen.property_context, self.pool
+        )
 
         invs = self._synthesize()
 
+        if self.psc.precheck_engines != "":
+            logger.info(
+                f"Pre-check rejected {self.saved_proofs} candidates, saving as many full proofs."
+            )
+
         if invs is None:
             # Synthesis failed
             logger.warn("Invariant synthesis failed.")
@@ -2,7 +2,7 @@ import logging
 import sys
 
 from ..btorinterface.pycbtorsymex import PYCBTORSymex
-from ..per import Module, Eq, CondEq
+from ..per import Module, Eq, CondEq, per_elems
 
 from .invverifier import InvVerifier
 
@@ -35,13 +35,13 @@ class BTORVerifier2Trace(InvVerifier):
         condeq_assrts = []
 
         # Generate the assumptions and assertions
-        for p in self.topmod._pycinternal__input:
+        for p in per_elems(self.topmod._pycinternal__input):
             match p:
                 case Eq():
                     eq_assms.append(p.logic)
                 case CondEq():
                     condeq_assms.append((p.cond, p.logic))
-        for p in self.topmod._pycinternal__state:
+        for p in per_elems(self.topmod._pycinternal__state):
             match p:
                 case Eq():
                     eq_assms.append(p.logic)
@@ -49,7 +49,7 @@ class BTORVerifier2Trace(InvVerifier):
                 case CondEq():
                     condeq_assms.append((p.cond, p.logic))
                     condeq_assrts.append((p.cond, p.logic))
-        for p in self.topmod._pycinternal__output:
+        for p in per_elems(self.topmod._pycinternal__output):
             match p:
                 case Eq():
                     eq_assrts.append(p.logic)
@@ -0,0 +1,69 @@
+import logging
+
+from ..pycmanager import PYConfig
+from ..jginterface.jasperclient import JasperSession
+from ..jginterface.enginetuner import EngineTuner
+
+from .. import svagen
+from ..jginterface.jgoracle import (
+    loadscript,
+    get_wctx,
+    set_assm_induction_1t,
+    set_assm_induction_2t,
+    set_assm_bmc,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class JGEngineTuner:
+    """Benchmarks Jasper engine mixes on the top-level properties of each
+    property class (two trace induction, one trace induction and BMC steps)"""
+
+    def __init__(self, pyconfig: PYConfig, jgs: JasperSession, tuner: EngineTuner):
+        self.psc = pyconfig
+        self.jgs = jgs
+        self.tuner = tuner
+        self.svagen = None
+
+    def tune(self, module) -> dict[str, str]:
+        """Benchmark the engine mixes for the given module and record their timings
+
+        Args:
+            module (Module): Module to tune the proof engines for
+
+        Returns:
+            dict[str, str]: best engine mix of each property class ("" for the
+                script's engines)
+        """
+        self.svagen = svagen.SVAGen(module)
+        self.svagen.create_pyc_specfile(
+            filename=self.psc.pycfile, k=self.psc.k, onetrace=self.psc.onetrace
+        )
+
+        loadscript(self.jgs, self.psc.script, None, self.psc.pycfile, self.psc.reload)
+        taskcon = self.psc.context
+        svacon = self.svagen.property_context
+        time_limit = self.psc.time_limit
+
+        best = {}
+        set_assm_induction_2t(self.jgs, taskcon, svacon)
+        best["2t"] = self.tuner.tune(
+            self.jgs, [get_wctx(taskcon, "P_output")], time_limit=time_limit
+        )
+        set_assm_induction_1t(self.jgs, taskcon, svacon)
+        best["1t"] = self.tuner.tune(
+            self.jgs, [get_wctx(taskcon, "P_output_inv")], time_limit=time_limit
+        )
+        set_assm_bmc(self.jgs, taskcon, svacon)
+        best["bmc"] = self.tuner.tune(
+            self.jgs,
+            [get_wctx(taskcon, f"P_step_{i}") for i in range(self.psc.k)],
+            time_limit=time_limit,
+        )
+
+        best_str = "\n\t".join(
+            [f"{pclass}: {engines or 'default'}" for pclass, engines in best.items()]
+        )
+        logger.info(f"Best proof engines per property class:\n\t{best_str}")
+        return best
@@ -1,15 +1,17 @@
 import logging
 
 from ..pycmanager import PYConfig
+from ..jginterface.jasperclient import JasperSession
+from ..jginterface.jasperpool import JasperPool
 
 from .. import svagen
 from ..jginterface.jgoracle import (
     prove_out_induction_1t,
     prove_out_induction_2t,
     prove_out_bmc,
+    prove_obligations,
     loadscript,
     is_pass,
-    disable_assm,
     set_assm_induction_1t,
     set_assm_induction_2t,
     set_assm_bmc,
@@ -20,12 +22,37 @@ from .invverifier import InvVerifier
 logger = logging.getLogger(__name__)
 
 
+def prove_granular(
+    jgs: JasperSession,
+    taskcon: str,
+    gen: svagen.SVAGen,
+    props: list[str],
+    pool: JasperPool = None,
+) -> bool:
+    """Prove the granular obligations of a spec and report those that fail
+
+    Returns:
+        bool: True if all obligations are proven, False otherwise
+    """
+    results = prove_obligations(jgs, taskcon, props, gen.obligations, pool)
+    failed = [prop for prop, res in zip(props, results) if not is_pass(res)]
+    logger.info(f"Proven {len(props) - len(failed)} of {len(props)} obligations.")
+    for prop in failed:
+        logger.info(f"Failing obligation: {prop}")
+    return len(failed) == 0
+
+
 class JGVerifier1Trace(InvVerifier):
     """One trace property verifier"""
 
-    def __init__(self, pyconfig: PYConfig) -> None:
+    def __init__(
+        self, pyconfig: PYConfig, jgs: JasperSession, granular: bool = None
+    ) -> None:
         super().__init__(pyconfig)
+        self.jgs = jgs
         self.svagen = None
+        # Prove one obligation per invariant instead of the output property
+        self.granular = pyconfig.granular if granular is None else granular
 
     def verify(self, module) -> bool:
         """Verify one trace properties for the given module
@@ -39,15 +66,26 @@ class JGVerifier1Trace(InvVerifier):
 
         self.svagen = svagen.SVAGen(module)
         self.svagen.create_pyc_specfile(
-            filename=self.psc.pycfile, k=self.psc.k, onetrace=True
+            filename=self.psc.pycfile,
+            k=self.psc.k,
+            onetrace=True,
+            granular=self.granular,
         )
         self.candidates = self.svagen.holes
 
-        loadscript(self.psc.script)
+        loadscript(self.jgs, self.psc.script, None, self.psc.pycfile, self.psc.reload)
         # Enable the assumptions for 1 trace verification
-        set_assm_induction_1t(self.psc.context, self.svagen.property_context)
-
-        res = is_pass(prove_out_induction_1t(self.psc.context))
+        set_assm_induction_1t(self.jgs, self.psc.context, self.svagen.property_context)
+
+        if self.granular:
+            res = prove_granular(
+                self.jgs,
+                self.psc.context,
+                self.svagen,
+                self.svagen.property_context.obligations_1trace,
+            )
+        else:
+            res = is_pass(prove_out_induction_1t(self.jgs, self.psc.context))
         res_str = "SAFE" if res else "UNSAFE"
         logger.info(f"One trace verification result: {res_str}")
         return res
@@ -56,9 +94,24 @@ class JGVerifier1Trace(InvVerifier):
 class JGVerifier2Trace(InvVerifier):
     """Two trace property verifier"""
 
-    def __init__(self, pyconfig: PYConfig) -> None:
+    def __init__(
+        self,
+        pyconfig: PYConfig,
+        jgs: JasperSession,
+        pool: JasperPool = None,
+        race: list[str] = None,
+        granular: bool = None,
+    ) -> None:
         super().__init__(pyconfig)
+        self.jgs = jgs
         self.svagen = None
+        # Engine mixes to race for the output property across the main session
+        # and the pool (no race if empty or without a pool)
+        self.race = pyconfig.race if race is None else race
+        # Prove one obligation per PER and invariant instead of the output property
+        self.granular = pyconfig.granular if granular is None else granular
+        # Pool of sessions to race proofs on (or to spread obligations across)
+        self.pool = pool if self.race or self.granular else None
 
     def verify(self, module):
         """Verify two trace properties for the given module
@@ -70,14 +123,33 @@ class JGVerifier2Trace(InvVerifier):
             bool: True if the module is safe, False otherwise
         """
         self.svagen = svagen.SVAGen(module)
-        self.svagen.create_pyc_specfile(filename=self.psc.pycfile, k=self.psc.k)
+        self.svagen.create_pyc_specfile(
+            filename=self.psc.pycfile, k=self.psc.k, granular=self.granular
+        )
         self.candidates = self.svagen.holes
 
-        loadscript(self.psc.script)
+        loadscript(
+            self.jgs, self.psc.script, self.pool, self.psc.pycfile, self.psc.reload
+        )
         # Enable the assumptions for 2 trace verification
-        set_assm_induction_2t(self.psc.context, self.svagen.property_context)
+        set_assm_induction_2t(
+            self.jgs, self.psc.context, self.svagen.property_context, self.pool
+        )
 
-        res = is_pass(prove_out_induction_2t(self.psc.context))
+        if self.granular:
+            res = prove_granular(
+                self.jgs,
+                self.psc.context,
+                self.svagen,
+                self.svagen.property_context.obligations_2trace,
+                self.pool,
+            )
+        elif self.pool is not None and self.race:
+            res = is_pass(
+                self.pool.race(self.jgs, self.psc.context, "output", self.race)
+            )
+        else:
+            res = is_pass(prove_out_induction_2t(self.jgs, self.psc.context))
         res_str = "SAFE" if res else "UNSAFE"
         logger.info(f"Two trace verification result: {res_str}")
         return res
@@ -86,9 +158,14 @@ class JGVerifier2Trace(InvVerifier):
 class JGVerifier1TraceBMC(InvVerifier):
     """One trace property verifier with BMC"""
 
-    def __init__(self, pyconfig: PYConfig) -> None:
+    def __init__(
+        self, pyconfig: PYConfig, jgs: JasperSession, pool: JasperPool = None
+    ) -> None:
         super().__init__(pyconfig)
+        self.jgs = jgs
         self.svagen = None
+        # Pool of sessions to spread step proofs across
+        self.pool = pool
 
     def verify(self, module):
         """Verify one trace properties for the given module
@@ -104,11 +181,20 @@ class JGVerifier1TraceBMC(InvVerifier):
         self.svagen.create_pyc_specfile(filename=self.psc.pycfile, k=self.psc.k)
         self.candidates = self.svagen.holes
 
-        loadscript(self.psc.script)
+        loadscript(
+            self.jgs, self.psc.script, self.pool, self.psc.pycfile, self.psc.reload
+        )
         # Enable the assumptions for 1 trace verification
-        set_assm_bmc(self.psc.context, self.svagen.property_context)
+        set_assm_bmc(
+            self.jgs, self.psc.context, self.svagen.property_context, self.pool
+        )
 
-        results = [is_pass(r) for r in prove_out_bmc(self.psc.context, self.psc.k)]
+        results = [
+            is_pass(r)
+            for r in prove_out_bmc(
+                self.jgs, self.psc.context, self.psc.k, self.pool, self.psc.background
+            )
+        ]
         results_str = "\n\t".join(
             [
                 f"Step {i}: SAFE" if res else f"Step {i}: UNSAFE"
@@ -2,6 +2,7 @@ import sys
 import logging
 
 from pycaliper.verif.jgverifier import JGVerifier1Trace, JGVerifier2Trace, JGVerifier1TraceBMC
+from pycaliper.verif.jgtuner import JGEngineTuner
 from pycaliper.synth.persynthesis import PERSynthesizer
 from pycaliper.svagen import SVAGen
 from pycaliper.synth.alignsynthesis import AlignSynthesizer
@@ -39,26 +40,45 @@ def verif_main(
         sdir: Annotated[str, Option(help="Directory to save results to.")] = "",
         # Allow using --port
         port: Annotated[int, Option(help="Port number to connect to Jasper server")] = 8080,
+        # Allow using --pool
+        pool: Annotated[str, Option(help="Ports of additional Jasper servers for parallel proofs: <port>(,<port>)*")] = "",
+        # Allow using --cache
+        cache: Annotated[bool, Option(help="Reuse proof results cached by previous runs.")] = False,
+        # Allow using --tuning
+        tuning: Annotated[bool, Option(help="Pick proof engines from the proof timings of previous runs (see tune).")] = False,
+        # Allow using --record
+        record: Annotated[str, Option(help="Record the Jasper sessions to a log (.gz to compress).")] = "",
+        # Allow using --replay
+        replay: Annotated[str, Option(help="Replay the Jasper sessions from a recorded log instead of connecting to Jasper.")] = "",
+        # Allow using --time-limit
+        time_limit: Annotated[int, Option(help="Time limit in seconds of each proof (0 for none).")] = 0,
+        # Allow using --background
+        background: Annotated[bool, Option(help="Run independent proofs as concurrent background jobs in Jasper.")] = False,
+        # Allow using --race
+        race: Annotated[str, Option(help="Engine mixes to race across the main and pool sessions for the two trace output property: <mix>(,<mix>)*")] = "",
+        # Allow using --granular
+        granular: Annotated[bool, Option(help="Prove one obligation per PER and invariant instead of the output property.")] = False,
         # Allow using --onetrace
         onetrace: Annotated[bool, Option(help="Verify only one-trace properties.")] = False,
         # Allow using --bmc
         bmc: Annotated[bool, Option(help="Perform verification with bounded model checking.")] = False):
-    args = PYCArgs(path=path, mock=mock, params=params, sdir=sdir, port=port, onetrace=onetrace, bmc=bmc)
+    args = PYCArgs(path=path, mock=mock, params=params, sdir=sdir, port=port, pool=pool, cache=cache, tuning=tuning, record=record, replay=replay, time_limit=time_limit, background=background, race=race, granular=granular, onetrace=onetrace, bmc=bmc)
     if not bmc:
         if onetrace:
             pconfig, tmgr, module = start(PYCTask.VERIF1T, args)
-            verifier = JGVerifier1Trace(pconfig)
+            verifier = JGVerifier1Trace(pconfig, tmgr.jgs)
             logger.debug("Running single trace verification.")
         else:
             pconfig, tmgr, module = start(PYCTask.VERIF2T, args)
-            verifier = JGVerifier2Trace(pconfig)
+            verifier = JGVerifier2Trace(pconfig, tmgr.jgs, tmgr.pool)
             logger.debug("Running two trace verification.")
     else:
         pconfig, tmgr, module = start(PYCTask.VERIFBMC, args)
-        verifier = JGVerifier1TraceBMC(pconfig)
+        verifier = JGVerifier1TraceBMC(pconfig, tmgr.jgs, tmgr.pool)
         logger.debug("Running BMC verification.")
 
     verifier.verify(module)
+    tmgr.close()
 
 @app.command("persynth")
 def persynth_main(
@@ -70,16 +90,51 @@ def persynth_main(
         # Allow using -s or --sdir
         sdir: Annotated[str, Option(help="Directory to save results to.")] = "",
         # Allow using --port
-        port: Annotated[int, Option(help="Port number to connect to Jasper server")] = 8080):
+        port: Annotated[int, Option(help="Port number to connect to Jasper server")] = 8080,
+        # Allow using --pool
+        pool: Annotated[str, Option(help="Ports of additional Jasper servers for parallel proofs: <port>(,<port>)*")] = "",
+        # Allow using --cache
+        cache: Annotated[bool, Option(help="Reuse proof results cached by previous runs.")] = False,
+        # Allow using --tuning
+        tuning: Annotated[bool, Option(help="Pick proof engines from the proof timings of previous runs (see tune).")] = False,
+        # Allow using --record
+        record: Annotated[str, Option(help="Record the Jasper sessions to a log (.gz to compress).")] = "",
+        # Allow using --replay
+        replay: Annotated[str, Option(help="Replay the Jasper sessions from a recorded log instead of connecting to Jasper.")] = "",
+        # Allow using --time-limit
+        time_limit: Annotated[int, Option(help="Time limit in seconds of each proof (0 for none).")] = 0,
+        # Allow using --background
+        background: Annotated[bool, Option(help="Run independent proofs as concurrent background jobs in Jasper.")] = False):
     
-    args = PYCArgs(path=path, mock=mock, params=params, sdir=sdir, port=port)
+    args = PYCArgs(path=path, mock=mock, params=params, sdir=sdir, port=port, pool=pool, cache=cache, tuning=tuning, record=record, replay=replay, time_limit=time_limit, background=background)
     pconfig, tmgr, module = start(PYCTask.PERSYNTH, args)
 
-    synthesizer = PERSynthesizer(pconfig)
+    synthesizer = PERSynthesizer(pconfig, tmgr.jgs, tmgr.pool)
     finalmod = synthesizer.synthesize(module)
 
     tmgr.save_spec(finalmod)
-    tmgr.save()
+    tmgr.close()
+
+
+@app.command("tune")
+def tune_main(
+        path: Annotated[str, Argument(help="Path to the JSON config file")] = "",
+        # Allow using --params
+        params: Annotated[str, Option(help="Parameters for the spec module: (<key>=<intvalue>)+")] = "",
+        # Allow using -s or --sdir
+        sdir: Annotated[str, Option(help="Directory to save results to.")] = "",
+        # Allow using --port
+        port: Annotated[int, Option(help="Port number to connect to Jasper server")] = 8080,
+        # Allow using --time-limit
+        time_limit: Annotated[int, Option(help="Time limit in seconds of each benchmarked proof (0 for none).")] = 60,
+        # Allow using --onetrace
+        onetrace: Annotated[bool, Option(help="Generate only one-trace invariant declarations.")] = False):
+    args = PYCArgs(path=path, params=params, sdir=sdir, port=port, tuning=True, time_limit=time_limit, onetrace=onetrace)
+    pconfig, tmgr, module = start(PYCTask.TUNE, args)
+
+    tuner = JGEngineTuner(pconfig, tmgr.jgs, tmgr.tuner)
+    tuner.tune(module)
+    tmgr.close()
 
 
 @app.command("svagen")
@@ -110,16 +165,20 @@ def alignsynth_main(
         # Allow using -s or --sdir
         sdir: Annotated[str, Option(help="Directory to save results to.")] = "",
         # Allow using --port
-        port: Annotated[int, Option(help="Port number to connect to Jasper server")] = 8080):
-    args = PYCArgs(path=path, mock=mock, params=params, sdir=sdir, port=port)
+        port: Annotated[int, Option(help="Port number to connect to Jasper server")] = 8080,
+        # Allow using --record
+        record: Annotated[str, Option(help="Record the Jasper sessions to a log (.gz to compress).")] = "",
+        # Allow using --replay
+        replay: Annotated[str, Option(help="Replay the Jasper sessions from a recorded log instead of connecting to Jasper.")] = ""):
+    args = PYCArgs(path=path, mock=mock, params=params, sdir=sdir, port=port, record=record, replay=replay)
 
     pconfig, tmgr, module = start(PYCTask.CTRLSYNTH, args)
 
-    synthesizer = AlignSynthesizer(tmgr, pconfig)
+    synthesizer = AlignSynthesizer(tmgr, pconfig, tmgr.jgs)
     asmod = synthesizer.synthesize(module)
 
     tmgr.save_spec(asmod)
-    tmgr.save()
+    tmgr.close()
 
 
 @app.command("fullsynth")
@@ -132,17 +191,31 @@ def fullsynth_main(
         # Allow using -s or --sdir
         sdir: Annotated[str, Option(help="Directory to save results to.")] = "",
         # Allow using --port
-        port: Annotated[int, Option(help="Port number to connect to Jasper server")] = 8080):
-    args = PYCArgs(path=path, mock=mock, params=params, sdir=sdir, port=port)
+        port: Annotated[int, Option(help="Port number to connect to Jasper server")] = 8080,
+        # Allow using --pool
+        pool: Annotated[str, Option(help="Ports of additional Jasper servers for parallel proofs: <port>(,<port>)*")] = "",
+        # Allow using --cache
+        cache: Annotated[bool, Option(help="Reuse proof results cached by previous runs.")] = False,
+        # Allow using --tuning
+        tuning: Annotated[bool, Option(help="Pick proof engines from the proof timings of previous runs (see tune).")] = False,
+        # Allow using --record
+        record: Annotated[str, Option(help="Record the Jasper sessions to a log (.gz to compress).")] = "",
+        # Allow using --replay
+        replay: Annotated[str, Option(help="Replay the Jasper sessions from a recorded log instead of connecting to Jasper.")] = "",
+        # Allow using --time-limit
+        time_limit: Annotated[int, Option(help="Time limit in seconds of each proof (0 for none).")] = 0,
+        # Allow using --background
+        background: Annotated[bool, Option(help="Run independent proofs as concurrent background jobs in Jasper.")] = False):
+    args = PYCArgs(path=path, mock=mock, params=params, sdir=sdir, port=port, pool=pool, cache=cache, tuning=tuning, record=record, replay=replay, time_limit=time_limit, background=background)
     pconfig, tmgr, module = start(PYCTask.FULLSYNTH, args)
 
     # PER Synthesizer
-    psynth = PERSynthesizer(pconfig)
+    psynth = PERSynthesizer(pconfig, tmgr.jgs, tmgr.pool)
 
-    verif = JGVerifier1Trace(pconfig)
+    verif = JGVerifier1Trace(pconfig, tmgr.jgs)
 
     # CA Synthesizer
-    asynth = AlignSynthesizer(tmgr, pconfig)
+    asynth = AlignSynthesizer(tmgr, pconfig, tmgr.jgs)
     # Align synthesize module, save it and grab a copy
     asmod = asynth.synthesize(module)
     tmgr.save_spec(asmod)
@@ -158,7 +231,7 @@ def fullsynth_main(
     # PER Synthesize module
     finalmod = psynth.synthesize(asmod)
     tmgr.save_spec(finalmod)
-    tmgr.save()
+    tmgr.close()
 
 if __name__ == "__main__":
     app()
@@ -1,6 +1,9 @@
 import logging
 import sys
 import os
+import glob
+import asyncio
+import subprocess
 
 import unittest
 import json
@@ -9,7 +12,7 @@ import btoropt
 
 from argparse import Namespace
 
-from tempfile import NamedTemporaryFile
+from tempfile import NamedTemporaryFile, TemporaryDirectory
 
 from pycaliper.pycmanager import get_pyconfig, PYCArgs, PYCTask, start
 
@@ -18,16 +21,40 @@ from pycaliper.frontend.pycparse import parser
 from pycaliper.frontend.pycgen import PYCGenPass
 
 from pycaliper.verif.jgverifier import JGVerifier2Trace
-from pycaliper.svagen import SVAGen
-import pycaliper.jginterface.jasperclient as jgc
+from pycaliper.svagen import SVAGen, SpecWriter, spec_files
 from pycaliper.btorinterface.pycbtorsymex import PYCBTORSymex
 from pycaliper.verif.btorverifier import BTORVerifier2Trace
 from pycaliper.verif.jgverifier import JGVerifier1TraceBMC, JGVerifier1Trace
+from pycaliper.jginterface.jasperstub import JasperStub
+from pycaliper.jginterface.enginetuner import EngineTuner
+from pycaliper.jginterface.proofcache import ProofCache
+from pycaliper.jginterface.designhash import design_hash
+from pycaliper.synth.persynthesis import PERSynthesizer
+from pycaliper.jginterface.jasperclient import JasperSession, JasperError, SocketError
+from pycaliper.jginterface.asyncjasperclient import AsyncJasperSession
+from pycaliper.jginterface.jasperpool import JasperPool
+from pycaliper.jginterface.jgoracle import (
+    prove,
+    prove_many,
+    prove_async,
+    wait_any,
+    wait_all,
+    ProofHandle,
+    setjwd,
+    loadscript,
+    disable_assm,
+    enable_assm,
+    set_assms,
+    ProofResult,
+)
 
 from btor2ex import BoolectorSolver
 from btor2ex.btor2ex.utils import parsewrapper
 
+from pycaliper.per import Module, Logic, LogicArray, per_elems
+from pycaliper.per.expr import Const
 from specs.regblock import regblock
+from specs.regblock_syn import regblock_syn
 from specs.array_nonzerobase import array_nonzerobase
 from specs.counter import counter
 
@@ -62,6 +89,144 @@ class TestSVAGen(unittest.TestCase):
     def test_auxmodule(self):
         self.gen_sva(counter(), "counter.pyc.sv")
 
+    def test_shards(self):
+        svagen = SVAGen(regblock())
+        hashes = svagen.create_pyc_specfile(k=2, filename="tests/out/shards.pyc.sv")
+        self.assertEqual(len(hashes), len(svagen.specs) + 1)
+        self.assertEqual(sorted(hashes), sorted(spec_files("tests/out/shards.pyc.sv")))
+        # Regenerating the same spec leaves all files untouched
+        svagen = SVAGen(regblock())
+        self.assertEqual(
+            svagen.create_pyc_specfile(k=2, filename="tests/out/shards.pyc.sv"), hashes
+        )
+        self.assertEqual(svagen.written, [])
+        # Other files next to the spec are left alone
+        with open("tests/out/shards.pyc.v2.sv", "w") as f:
+            f.write("// design file\n")
+        svagen.create_pyc_specfile(k=2, filename="tests/out/shards.pyc.sv")
+        self.assertTrue(os.path.exists("tests/out/shards.pyc.v2.sv"))
+        # A failed generation leaves no temporary file behind
+        with self.assertRaises(RuntimeError):
+            with SpecWriter("tests/out/failed.pyc.sv") as writer:
+                writer.write("// partial\n")
+                raise RuntimeError("generation failed")
+        self.assertEqual(glob.glob("tests/out/.failed.pyc.sv.*"), [])
+
+    def test_shard_names(self):
+        class reg(Module):
+            def __init__(self, **kwargs):
+                super().__init__()
+                self.q = Logic(8)
+
+            def state(self):
+                self.eq(self.q)
+
+        class pair(Module):
+            def __init__(self, **kwargs):
+                super().__init__()
+                self.b = reg()
+
+        class wrapper(Module):
+            def __init__(self, **kwargs):
+                super().__init__()
+                # Submodules whose flattened paths used to collide
+                self.top = reg()
+                self.a = pair()
+                self.a_b = reg()
+
+        svagen = SVAGen(wrapper())
+        hashes = svagen.create_pyc_specfile(k=2, filename="tests/out/wrapper.pyc.sv")
+        self.assertEqual(len(set(svagen.specs.values())), 5)
+        self.assertEqual(sorted(hashes), sorted(spec_files("tests/out/wrapper.pyc.sv")))
+        for name in ["_root", "top", "a", "a__b", "a_ub"]:
+            self.assertTrue(os.path.exists(f"tests/out/wrapper.pyc.pycshard.{name}.sv"))
+
+    def test_array_eq(self):
+        class regfile(Module):
+            def __init__(self, **kwargs):
+                super().__init__()
+                self.rf = LogicArray(lambda: Logic(32), 4096)
+
+            def input(self):
+                self.eq(self.rf)
+
+            def state(self):
+                self.eq(self.rf[0:4096:2])
+
+        mod = regfile()
+        SVAGen(mod).create_pyc_specfile(k=2, filename="tests/out/regfile.pyc.sv")
+        with open("tests/out/regfile.pyc.pycshard._root.sv") as f:
+            shard = f.read()
+        # One generate loop per array PER instead of one wire per element
+        self.assertEqual(shard.count("assign"), 2)
+        self.assertIn("(&eq_rf_all)", shard)
+        self.assertIn("a.rf[2*i] == b.rf[2*i]", shard)
+        self.assertEqual(len(per_elems(mod._pycinternal__state)), 2048)
+
+    def test_cse(self):
+        class fifo(Module):
+            def __init__(self, **kwargs):
+                super().__init__()
+                self.valid = Logic(1)
+                self.count = Logic(4)
+                self.head = Logic(8)
+                self.tail = Logic(8)
+
+            def input(self):
+                self.eq(self.valid)
+
+            def state(self):
+                ready = self.valid & (self.count != Const(0, 4))
+                self.when(ready)(self.head, self.tail)
+                self.inv(ready | (self.count == Const(0, 4)))
+
+        SVAGen(fifo()).create_pyc_specfile(k=2, filename="tests/out/fifo.pyc.sv")
+        with open("tests/out/fifo.pyc.pycshard._root.sv") as f:
+            shard = f.read()
+        # The shared condition is hoisted into one wire per trace
+        self.assertEqual(shard.count("wire cse__root_"), 2)
+        self.assertIn("wire cse__root_0 = (a.valid && (a.count != 4'd0));", shard)
+        self.assertEqual(shard.count("!(cse__root_0 && cse__root_1)"), 2)
+        self.assertIn("(cse__root_1 || (b.count == 4'd0))", shard)
+
+        class nested(fifo):
+            def __init__(self, **kwargs):
+                super().__init__()
+                self.top = fifo()
+
+        # A submodule named top gets wires of its own
+        SVAGen(nested()).create_pyc_specfile(k=2, filename="tests/out/nested.pyc.sv")
+        with open("tests/out/nested.pyc.pycshard._root.sv") as f:
+            shard = f.read()
+        self.assertEqual(shard.count("wire cse__root_"), 2)
+        self.assertNotIn("cse_top_", shard)
+        with open("tests/out/nested.pyc.pycshard.top.sv") as f:
+            shard = f.read()
+        self.assertIn("wire cse_top_0 = (a.top.valid && (a.top.count != 4'd0));", shard)
+        self.assertNotIn("cse__root_", shard)
+
+    def test_obligation_keys(self):
+        class handshake(Module):
+            def __init__(self, negate=False, **kwargs):
+                super().__init__()
+                self.negate = negate
+                self.v = Logic(1)
+                self.x = Logic(8)
+
+            def output(self):
+                self.when(~self.v if self.negate else self.v)(self.x)
+
+        keys = []
+        for negate in [False, True]:
+            gen = SVAGen(handshake(negate))
+            gen.create_pyc_specfile(
+                k=2, filename="tests/out/handshake.pyc.sv", granular=True
+            )
+            keys.append(gen.obligations)
+        # Same obligation, but its condition changed
+        self.assertEqual(keys[0].keys(), keys[1].keys())
+        self.assertNotEqual(keys[0], keys[1])
+
 
 class TestVerifier(unittest.TestCase):
     def gen_test(self, path, mock=False):
@@ -72,17 +237,469 @@ class TestVerifier(unittest.TestCase):
 
     def test_regblock(self):
         (pyconfig, tmgr, regb) = self.gen_test("designs/regblock/config.json")
-        invverif = JGVerifier2Trace(pyconfig)
+        invverif = JGVerifier2Trace(pyconfig, tmgr.jgs)
         invverif.verify(regb)
         tmgr.close()
 
     def test_counter(self):
         (pyconfig, tmgr, counter) = self.gen_test("designs/counter/config.json")
-        invverif = JGVerifier1Trace(pyconfig)
+        invverif = JGVerifier1Trace(pyconfig, tmgr.jgs)
         invverif.verify(counter)
         tmgr.close()
 
 
+class TestJasperStub(unittest.TestCase):
+    def setUp(self):
+        self.stubs = [
+            JasperStub(port=0, outcomes=[("*P_state_inv", "cex")]).start()
+            for _ in range(3)
+        ]
+
+    def tearDown(self):
+        for stub in self.stubs:
+            stub.stop()
+
+    def gen_test(self, path, pool=False, **kwargs):
+        args = PYCArgs(
+            path=path,
+            mock=False,
+            params="",
+            sdir="",
+            port=self.stubs[0].port,
+            pool=",".join([str(s.port) for s in self.stubs[1:]]) if pool else "",
+            onetrace=True,
+            bmc=True,
+            **kwargs,
+        )
+        return start(PYCTask.VERIFBMC, args)
+
+    def test_session(self):
+        jgs = JasperSession(port=self.stubs[0].port).connect()
+        self.assertEqual(jgs.eval("prove -property { embedded.P_step }"), "proven")
+        self.assertEqual(
+            jgs.eval_batch(
+                ["include x.tcl", "prove -property { embedded.P_state_inv }"]
+            ),
+            ["", "cex"],
+        )
+        other = JasperSession(port=self.stubs[0].port).connect()
+        self.assertEqual(jgs.queue_depth(), {"clients": 2, "jobs": 0, "client_jobs": 0})
+        other.close()
+        jgs.close()
+        self.assertEqual(self.stubs[0].counts, {"pid": 2, "prove": 2, "include": 1})
+        stats = jgs.stats.to_dict()
+        self.assertEqual(stats["commands"], {"pid": 1, "prove": 2, "include": 1})
+        self.assertEqual(set(stats["latency"].keys()), {"pid", "prove", "batch"})
+        self.assertGreater(stats["bytes_received"], 0)
+
+    def test_batch_error(self):
+        self.stubs[0].errors = ["analyze *"]
+        jgs = JasperSession(port=self.stubs[0].port).connect()
+        with self.assertRaises(JasperError) as e:
+            jgs.eval_batch(["include x.tcl", "analyze -sv bad.sv", "elaborate"])
+        self.assertEqual(str(e.exception), "Error in command: analyze -sv bad.sv")
+        # The commands after the failing one still ran, and the session is usable
+        self.assertEqual(self.stubs[0].counts["elaborate"], 1)
+        self.assertEqual(jgs.eval_batch(["clock clk", "reset rst"]), ["", ""])
+        jgs.close()
+
+    def test_utf8_frames(self):
+        self.stubs[0].sizes = {"report": 100000}
+        jgs = JasperSession(port=self.stubs[0].port).connect()
+        # Frames are prefixed with their length in bytes, not in characters
+        self.assertEqual(jgs.eval("set greeting grüße ✓ 検証"), "grüße ✓ 検証")
+        self.assertEqual(
+            jgs.eval_batch(["set a ünïcödé", "report", "set b ✓"]),
+            ["ünïcödé", "x" * 100000, "✓"],
+        )
+        jgs.close()
+
+    def test_prove_many(self):
+        outcomes = [("*P_b", "cex"), ("*P_c", "undetermined"), ("*P_e", "cex")]
+        for stub in self.stubs:
+            stub.outcomes = outcomes
+        props = ["a", "b", "c", "d", "e"]
+        expected = [
+            ProofResult.PROVEN,
+            ProofResult.CEX,
+            ProofResult.UNKNOWN,
+            ProofResult.PROVEN,
+            ProofResult.CEX,
+        ]
+        jgs = JasperSession(port=self.stubs[0].port).connect()
+        self.assertEqual(prove_many(jgs, "embedded", props), expected)
+        # One multi-property proof, the statuses are queried in the same batch
+        self.assertEqual(self.stubs[0].counts["prove"], 1)
+        self.assertEqual(self.stubs[0].counts["get_status"], 5)
+        jgs.close()
+        # Split across a pool, the results keep the order of the properties
+        pool = JasperPool([stub.port for stub in self.stubs[1:]])
+        self.assertEqual(pool.prove_many("embedded", props), expected)
+        pool.close()
+        for stub in self.stubs[1:]:
+            self.assertEqual(stub.counts["prove"], 1)
+
+    def test_async_session(self):
+        async def run():
+            sessions = [
+                await AsyncJasperSession(port=stub.port).connect()
+                for stub in self.stubs
+            ]
+            results = await asyncio.gather(
+                sessions[0].prove("embedded", "state_inv"),
+                sessions[0].eval_batch(["include x.tcl", "prove -property { a.P }"]),
+                sessions[1].prove("embedded", "output"),
+                sessions[2].eval("prove -property { a.P }"),
+            )
+            for jgs in sessions:
+                await jgs.close()
+            return results
+
+        self.assertEqual(
+            asyncio.run(run()),
+            [ProofResult.CEX, ["", "proven"], ProofResult.PROVEN, "proven"],
+        )
+        # Inconclusive statuses are UNKNOWN rather than an error
+        self.stubs[0].default_outcome = "undetermined"
+
+        async def run_undetermined():
+            jgs = await AsyncJasperSession(port=self.stubs[0].port).connect()
+            res = await jgs.prove("embedded", "output")
+            await jgs.close()
+            return res
+
+        self.assertEqual(asyncio.run(run_undetermined()), ProofResult.UNKNOWN)
+
+    def test_assms(self):
+        jgs = JasperSession(port=self.stubs[0].port).connect()
+        counts = self.stubs[0].counts
+
+        set_assms(jgs, "embedded", enable=["a", "b"], disable=["c"])
+        self.assertEqual(counts["assume"], 3)
+        # Assumptions already in the requested state are not sent again
+        set_assms(jgs, "embedded", enable=["a", "b"], disable=["c"])
+        self.assertEqual(counts["assume"], 3)
+        set_assms(jgs, "embedded", enable=["a"], disable=["b", "c"])
+        self.assertEqual(counts["assume"], 4)
+        disable_assm(jgs, "embedded", "b")
+        self.assertEqual(counts["assume"], 4)
+        enable_assm(jgs, "embedded", "b")
+        self.assertEqual(counts["assume"], 5)
+        # Loading the script resets the assumptions, they are all sent again
+        loadscript(jgs, "regblock.tcl")
+        self.assertEqual(jgs.assms, {})
+        set_assms(jgs, "embedded", enable=["a"], disable=["c"])
+        self.assertEqual(counts["assume"], 7)
+        jgs.close()
+
+    def test_reconnect(self):
+        jgs = JasperSession(port=self.stubs[0].port).connect()
+        setjwd(jgs, "designs/regblock")
+        loadscript(jgs, "regblock.tcl")
+        disable_assm(jgs, "embedded", "state_inv")
+        # Restart the server
+        self.stubs[0].stop()
+        self.stubs[0] = JasperStub(port=self.stubs[0].port).start()
+        # A proof is not resent, the caller decides whether to retry it
+        with self.assertRaises(SocketError):
+            prove(jgs, "embedded", "step")
+        # The session state was replayed on reconnecting
+        self.assertEqual(
+            self.stubs[0].counts, {"pid": 1, "cd": 1, "include": 1, "assume": 1}
+        )
+        self.assertEqual(prove(jgs, "embedded", "step"), ProofResult.PROVEN)
+        # Restart the server again, commands that can be repeated are resent
+        self.stubs[0].stop()
+        self.stubs[0] = JasperStub(port=self.stubs[0].port).start()
+        enable_assm(jgs, "embedded", "state_inv")
+        self.assertEqual(
+            self.stubs[0].counts, {"pid": 1, "cd": 1, "include": 1, "assume": 2}
+        )
+        self.assertEqual(jgs.reconnects, 2)
+        jgs.close()
+
+    def test_regblock(self):
+        (pyconfig, tmgr, regb) = self.gen_test("designs/regblock/config.json")
+        self.assertTrue(JGVerifier2Trace(pyconfig, tmgr.jgs).verify(regb))
+        tmgr.close()
+
+    def test_time_limit(self):
+        self.stubs[0].durations = [("*P_slow", 1.5)]
+        jgs = JasperSession(port=self.stubs[0].port).connect()
+        jgs.time_limit = 1
+        self.assertEqual(prove(jgs, "embedded", "slow"), ProofResult.UNKNOWN)
+        self.assertEqual(prove(jgs, "embedded", "slow", 2), ProofResult.PROVEN)
+        self.assertEqual(
+            prove_many(jgs, "embedded", ["fast", "slow"]),
+            [ProofResult.PROVEN, ProofResult.UNKNOWN],
+        )
+        # The stub does not report a process to interrupt
+        self.assertRaises(JasperError, jgs.abort)
+        jgs.close()
+
+    def test_background(self):
+        self.stubs[0].durations = [("*P_slow", 0.5)]
+        jgs = JasperSession(port=self.stubs[0].port).connect()
+        handles = [prove_async(jgs, "embedded", p) for p in ["slow", "state_inv"]]
+        # Both proofs run at once, the fast one completes first
+        self.assertEqual(wait_any(handles), [handles[1]])
+        self.assertEqual(wait_all(handles), [ProofResult.PROVEN, ProofResult.CEX])
+        # A proof that never started is given up on past its time limit
+        lost = ProofHandle(jgs, "embedded.P_lost", time_limit=1, grace=0.2)
+        self.assertEqual(wait_all([lost]), [ProofResult.UNKNOWN])
+        jgs.close()
+
+    def test_background_reconnect(self):
+        self.stubs[0].durations = [("*P_slow", 0.5)]
+        jgs = JasperSession(port=self.stubs[0].port).connect()
+        handle = prove_async(jgs, "embedded", "slow")
+        # The server restarts and loses the job, which is started again
+        self.stubs[0].stop()
+        self.stubs[0] = JasperStub(port=self.stubs[0].port).start()
+        self.stubs[0].durations = [("*P_slow", 0.5)]
+        self.assertEqual(wait_all([handle]), [ProofResult.PROVEN])
+        self.assertEqual(self.stubs[0].counts["prove"], 1)
+        jgs.close()
+
+    def test_reload(self):
+        (pyconfig, tmgr, regb) = self.gen_test("designs/regblock/config.json")
+        verifier = JGVerifier2Trace(pyconfig, tmgr.jgs)
+        verifier.verify(regb)
+        # Nothing changed, the script is not loaded again
+        verifier.verify(regb)
+        self.assertEqual(self.stubs[0].counts["include"], 1)
+        # Only the SVA changed, the design is reloaded with the reload script
+        verifier.verify(regblock_syn())
+        self.assertEqual(self.stubs[0].counts["include"], 2)
+        self.assertEqual(tmgr.jgs.stats.commands["include"], 2)
+        tmgr.close()
+
+    def test_race(self):
+        # All proofs are sent before the fastest one returns
+        for stub, seconds in zip(self.stubs, [0.5, 0.2, 0.5]):
+            stub.durations = [("*P_output", seconds)]
+        (pyconfig, tmgr, regb) = self.gen_test(
+            "designs/regblock/config.json", pool=True, race="Ht,N,AM"
+        )
+        verifier = JGVerifier2Trace(pyconfig, tmgr.jgs, tmgr.pool)
+        self.assertTrue(verifier.verify(regb))
+        tmgr.close()
+        # Each session proved the output property with its engine mix
+        for stub in self.stubs:
+            self.assertEqual(stub.counts["prove"], 1)
+
+    def test_race_error(self):
+        # The first mix is not supported, the second one wins
+        self.stubs[0].errors = ["prove * -engine_mode { Ht }*"]
+        self.stubs[2].durations = [("*P_output", 0.5)]
+        jgs = JasperSession(port=self.stubs[0].port).connect()
+        pool = JasperPool([stub.port for stub in self.stubs[1:]])
+        self.assertEqual(
+            pool.race(jgs, "embedded", "output", ["Ht", "N", "AM"]),
+            ProofResult.PROVEN,
+        )
+        # The race fails only if every racer does
+        for stub in self.stubs:
+            stub.errors = ["prove *"]
+        self.assertRaises(
+            JasperError, pool.race, jgs, "embedded", "output", ["Ht", "N", "AM"]
+        )
+        pool.close()
+        jgs.close()
+
+    def test_race_cancel(self):
+        self.stubs[2].durations = [("*P_output", 0.5)]
+        jgs = JasperSession(port=self.stubs[0].port).connect()
+        pool = JasperPool([stub.port for stub in self.stubs[1:]])
+        # The first pool session only gets to send its proof after the race
+        # is won (its racer waits on the queue depth of its server first)
+        self.stubs[1].latency = {"QUEUE": 0.5}
+        self.assertEqual(
+            pool.race(jgs, "embedded", "output", ["Ht", "N", "AM"]),
+            ProofResult.PROVEN,
+        )
+        self.assertNotIn("prove", self.stubs[1].counts)
+        # The sessions prove again after the race
+        self.stubs[1].latency = {}
+        self.assertEqual(pool.prove("embedded", "output").result(), ProofResult.PROVEN)
+        pool.close()
+        jgs.close()
+
+    def test_abort_shared(self):
+        jgs = JasperSession(port=self.stubs[0].port).connect()
+        other = JasperSession(port=self.stubs[0].port).connect()
+        # Stand-in for the server process, which must not be interrupted
+        server = subprocess.Popen(["sleep", "10"])
+        jgs.pid, jgs.busy = server.pid, True
+        self.assertEqual(jgs.queue_depth()["clients"], 2)
+        self.assertRaises(JasperError, jgs.abort)
+        self.assertIsNone(server.poll())
+        server.kill()
+        server.wait()
+        jgs.busy = False
+        other.close()
+        jgs.close()
+
+    def test_granular(self):
+        for stub in self.stubs:
+            stub.outcomes = [("*P_output__eq_q", "cex")]
+        (pyconfig, tmgr, regb) = self.gen_test(
+            "designs/regblock/config.json", pool=True, granular=True
+        )
+        verifier = JGVerifier2Trace(pyconfig, tmgr.jgs, tmgr.pool)
+        self.assertFalse(verifier.verify(regb))
+        tmgr.close()
+        obligations = verifier.svagen.property_context.obligations_2trace
+        self.assertEqual(
+            obligations, ["state__eq_reg1_q", "state__eq_reg2_q", "output__eq_q"]
+        )
+        self.assertEqual(sorted(verifier.svagen.obligations), sorted(obligations))
+        # The obligations were spread across the pool sessions
+        for stub in self.stubs[1:]:
+            self.assertEqual(stub.counts["prove"], 1)
+
+    def test_tuning(self):
+        with NamedTemporaryFile(suffix=".db") as db:
+            tuner = EngineTuner("regblock", db.name)
+            tuner.record("embedded.P_output", "Ht", ProofResult.PROVEN, 2.0)
+            tuner.record("embedded.P_output", "N", ProofResult.PROVEN, 1.0)
+            tuner.record("embedded.P_output", "B", ProofResult.UNKNOWN, 0.5)
+            # Conclusive engines first, then the fastest
+            self.assertEqual(tuner.best("2t"), "N")
+            self.assertEqual(tuner.best("bmc"), "")
+            jgs = JasperSession(port=self.stubs[0].port).connect()
+            jgs.tuner = tuner
+            self.assertEqual(prove(jgs, "embedded", "output"), ProofResult.PROVEN)
+            self.assertEqual(tuner.picked, {"2t": "N"})
+            # Benchmark the default engines and the 1t engine mixes
+            tuner.tune(jgs, ["embedded.P_output_inv"])
+            self.assertEqual(self.stubs[0].counts["prove"], 7)
+            jgs.close()
+            tuner.close()
+
+    def test_precheck(self):
+        self.stubs[0].outcomes = [("*P_eq_reg2_q", "cex"), ("*P_output", "cex")]
+        (pyconfig, tmgr, regb) = self.gen_test("designs/regblock/config_syn.json")
+        self.assertEqual(pyconfig.precheck_engines, "B")
+        synthesizer = PERSynthesizer(pyconfig, tmgr.jgs)
+        synthesizer.synthesize(regb)
+        tmgr.close()
+        # Candidates with a counterexample were rejected without a full proof
+        self.assertGreater(synthesizer.saved_proofs, 0)
+
+    def test_retries(self):
+        self.stubs[0].durations = [("*P_eq_slow", 100)]
+        (pyconfig, tmgr, _) = self.gen_test(
+            "designs/regblock/config_syn.json", time_limit=1
+        )
+        pyconfig.precheck_time_limit = 1
+        synthesizer = PERSynthesizer(pyconfig, tmgr.jgs)
+        synthesizer.MAX_RETRIES = 1
+        synthesizer.candidates = {"eq_fast": None, "eq_slow": None}
+        with self.assertLogs("pycaliper.synth.persynthesis", logging.WARNING) as logs:
+            synthesizer._saturate()
+        tmgr.close()
+        self.assertEqual(synthesizer.synstate.asrts, ["eq_fast"])
+        self.assertIn("['eq_slow']", logs.output[0])
+        # Two pre-checked passes (before and after eq_fast was added), and
+        # a retry of eq_slow with a doubled time limit but no pre-check
+        self.assertEqual(self.stubs[0].counts["prove"], 5)
+
+    def test_adder_pool(self):
+        (pconfig, tmgr, module) = self.gen_test("designs/adder/config.json", pool=True)
+        JGVerifier1TraceBMC(pconfig, tmgr.jgs, tmgr.pool).verify(module)
+        tmgr.close()
+        # The pool sessions restore the design loaded in the main session
+        loads = self.stubs[0].counts["include"]
+        self.assertEqual(self.stubs[0].counts["save"], loads)
+        for stub in self.stubs[1:]:
+            self.assertEqual(stub.counts["restore"], loads)
+            self.assertNotIn("include", stub.counts)
+
+    def test_record_replay(self):
+        with NamedTemporaryFile(suffix=".log.gz") as log:
+            (pyconfig, tmgr, regb) = self.gen_test(
+                "designs/regblock/config.json", record=log.name
+            )
+            self.assertTrue(JGVerifier2Trace(pyconfig, tmgr.jgs).verify(regb))
+            tmgr.close()
+            sent = tmgr.jgs.msgs_sent
+            counts = dict(self.stubs[0].counts)
+
+            (pyconfig, tmgr, regb) = self.gen_test(
+                "designs/regblock/config.json", replay=log.name
+            )
+            self.assertTrue(JGVerifier2Trace(pyconfig, tmgr.jgs).verify(regb))
+            tmgr.close()
+            # All but the query of the server process when connecting
+            self.assertEqual(tmgr.jgs.msgs_sent, sent - 1)
+            # Nothing was sent to the server during the replay
+            self.assertEqual(self.stubs[0].counts, counts)
+
+
+class TestProofCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        # RTL outside the Jasper directory, found through the file list
+        self.rtl = os.path.join(self.tmp.name, "rtl", "ip.sv")
+        self.jdir = os.path.join(self.tmp.name, "jasper")
+        self.spec = os.path.join(self.jdir, "ip.pyc.sv")
+        self.write(self.rtl, "module ip; endmodule\n")
+        self.write(
+            os.path.join(self.jdir, "ip.tcl"),
+            "set env(IP_HOME) [pwd]/../rtl\nanalyze -sv12 -f design.lst\n",
+        )
+        self.write(os.path.join(self.jdir, "design.lst"), "${IP_HOME}/ip.sv\n")
+        self.write(self.spec, "// spec\n")
+        self.cache = ProofCache(
+            self.jdir, "ip.tcl", self.spec, os.path.join(self.tmp.name, "cache.db")
+        )
+        self.cache.refresh()
+        self.jgs = JasperSession()
+        self.jgs.assms = {"embedded.A_input": True}
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def lookup(self):
+        self.cache.refresh()
+        return self.cache.lookup(self.jgs, "embedded.P_output")
+
+    def test_hits(self):
+        self.cache.store(self.jgs, "embedded.P_output", ProofResult.PROVEN, 1.0)
+        self.assertEqual(self.lookup(), ProofResult.PROVEN)
+        # A change of the spec misses, until it is reverted
+        self.write(self.spec, "// edited spec\n")
+        self.assertIsNone(self.lookup())
+        self.write(self.spec, "// spec\n")
+        self.assertEqual(self.lookup(), ProofResult.PROVEN)
+        # So does a change of the enabled assumptions
+        self.jgs.assms["embedded.A_state"] = True
+        self.assertIsNone(self.lookup())
+        self.jgs.assms["embedded.A_state"] = False
+        self.assertEqual(self.lookup(), ProofResult.PROVEN)
+        # And a change of the design, also outside the Jasper directory
+        self.write(self.rtl, "module ip(input clk); endmodule\n")
+        self.assertIsNone(self.lookup())
+        self.assertEqual(self.cache.stats()["hits"], 3)
+
+    def test_unknown(self):
+        self.cache.store(self.jgs, "embedded.P_output", ProofResult.UNKNOWN, 1.0)
+        self.assertIsNone(self.lookup())
+
+    def test_missed_dependency(self):
+        self.write(os.path.join(self.jdir, "design.lst"), "${NO_SUCH_HOME}/ip.sv\n")
+        self.assertNotEqual(
+            design_hash(self.jdir, "ip.tcl"), design_hash(self.jdir, "ip.tcl")
+        )
+
+
 class TestParser(unittest.TestCase):
     def load_test(self, testname):
         filename = os.path.join("tests/specs", testname)
@@ -149,7 +766,7 @@ class SymbolicSimulator(unittest.TestCase):
 
     def test_adder(self):
         (pconfig, tmgr, module) = self.gen_test("designs/adder/config.json")
-        verifier = JGVerifier1TraceBMC(pconfig)
+        verifier = JGVerifier1TraceBMC(pconfig, tmgr.jgs)
         logger.debug("Running BMC verification.")
         verifier.verify(module)
         tmgr.close()